@@ -13,6 +13,7 @@ from discord.ext import commands
 
 from core import get_settings
 from utils import DiscordUtil
+from utils.panopticon_client import PanopticonClient
 
 
 class Admin(commands.Cog):
@@ -218,6 +219,15 @@ class Admin(commands.Cog):
         embed.add_field(name="Discord.py", value=discord.__version__, inline=True)
         embed.add_field(name="Memory", value=f"{memory_usage:.2f} MB", inline=True)
 
+        # Panopticon接続状態
+        for base_url, state in PanopticonClient.shared_states().items():
+            lines = [f"`{base_url}`: {state.breaker.describe()}"]
+            lines.extend(state.metrics.summary())
+            value = "\n".join(lines)
+            if len(value) > 1024:
+                value = value[:1021] + "..."
+            embed.add_field(name="Panopticon", value=value, inline=False)
+
         # フッター
         embed.set_footer(
             text=f"Requested by {ctx.author}", icon_url=ctx.author.display_avatar.url
@@ -0,0 +1,129 @@
+import asyncio
+import datetime
+import logging
+
+import discord
+from discord.ext import commands, tasks
+
+from core import get_settings
+from db import db_session
+from db.crud.job import (
+    claim_jobs,
+    complete_job,
+    next_run_at,
+    reschedule_job,
+    schedule_job,
+)
+from utils.job_queue import job_registry, retry_delay
+
+
+class JobWorker(commands.Cog):
+    """
+    jobsテーブルのジョブを実行時刻に実行する
+    ジョブはFOR UPDATE SKIP LOCKEDで取得してリースを設定するため、複数インスタンスで動かしても
+    同じジョブが同時に実行されることはない（リース切れ・クラッシュ時は再実行される = at-least-once）
+    """
+
+    def __init__(self, bot: discord.Bot):
+        self.bot = bot
+        self.settings = get_settings()
+        self.logger = logging.getLogger("discord")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.worker.start()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if not self.worker.is_running():
+            self.worker.start()
+
+    @tasks.loop()
+    async def worker(self):
+        # 待機中に追加されたジョブを取りこぼさないよう、取得の前にクリアする
+        job_registry.wakeup.clear()
+
+        kinds = job_registry.kinds()
+        if kinds:
+            with db_session() as db:
+                jobs = claim_jobs(
+                    db,
+                    kinds,
+                    limit=self.settings.JOB_BATCH_SIZE,
+                    lease=datetime.timedelta(seconds=self.settings.JOB_LEASE_SECONDS),
+                )
+
+            if jobs:
+                await asyncio.gather(*[self._run(job) for job in jobs])
+                return
+
+            with db_session() as db:
+                run_at = next_run_at(db, kinds)
+        else:
+            run_at = None
+
+        # 次のジョブの実行時刻まで待機する（他のインスタンスが登録したジョブのため、最大でもpoll間隔）
+        timeout = self.settings.JOB_POLL_INTERVAL
+        if run_at is not None:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            timeout = min(max((run_at - now).total_seconds(), 0), timeout)
+
+        try:
+            await asyncio.wait_for(job_registry.wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self, job):
+        handler = job_registry.get(job.kind)
+        try:
+            await handler.func(job.payload)
+        except Exception as e:
+            self.logger.error(
+                f"[Job] {job.kind} #{job.id} failed (attempt {job.attempts}): {e}"
+            )
+            now = datetime.datetime.now(datetime.timezone.utc)
+            with db_session() as db:
+                if handler.interval is not None:
+                    # 定期ジョブは諦めずに、次の定期実行までの間で再試行する
+                    reschedule_job(
+                        db,
+                        job,
+                        now + min(retry_delay(job.attempts), handler.interval),
+                        error=str(e),
+                    )
+                elif job.attempts >= self.settings.JOB_MAX_ATTEMPTS:
+                    self.logger.error(
+                        f"[Job] {job.kind} #{job.id} gave up: {job.payload}"
+                    )
+                    complete_job(db, job)
+                else:
+                    reschedule_job(
+                        db, job, now + retry_delay(job.attempts), error=str(e)
+                    )
+            return
+
+        with db_session() as db:
+            if handler.interval is not None:
+                reschedule_job(
+                    db,
+                    job,
+                    datetime.datetime.now(datetime.timezone.utc) + handler.interval,
+                )
+            else:
+                complete_job(db, job)
+
+    @worker.before_loop
+    async def before_worker(self):
+        await self.bot.wait_until_ready()
+
+        # 定期ジョブを登録する（既に登録済みであれば実行予定時刻はそのまま）
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with db_session() as db:
+            for handler in job_registry.recurring():
+                schedule_job(
+                    db, handler.kind, now, dedupe_key=handler.kind, replace=False
+                )
+
+
+def setup(bot):
+    return bot.add_cog(JobWorker(bot))
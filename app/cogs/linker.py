@@ -1,18 +1,25 @@
 import logging
-from dataclasses import dataclass
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Optional
 
 import discord
 from discord.commands import slash_command
 from discord.ext import commands, tasks
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 
 from core import get_settings
 from db import db_session
-from db.models import Guild, RegisteredRole, NickUpdateTargetGuild
+from db.crud import crud_guild
+from db.models import RegisteredRole, NickUpdateTargetGuild
 from utils import DiscordUtil
+from utils.negative_cache import NegativeCache
+from utils.nick_sync_queue import NickSyncQueue
 from utils.panopticon_client import PanopticonClient
+from utils.panopticon_rate_limit import background_priority
+from utils.role_member_index import role_member_index
 
 
 @dataclass
@@ -33,6 +40,56 @@ class LinkedAccountInfo:
     wikidot: list[WikidotAccountInfo]
 
 
+@dataclass
+class SyncPlan:
+    """ロール・ニックネーム同期の実行計画"""
+
+    guild_id: int
+    member_count: int = 0
+    linked_count: int = 0
+    jp_member_count: int = 0
+
+    # role_id -> 対象メンバー
+    role_adds: dict[int, list[discord.Member]] = field(default_factory=dict)
+    role_removes: dict[int, list[discord.Member]] = field(default_factory=dict)
+    nick_edits: list[tuple[discord.Member, str]] = field(default_factory=list)
+    missing_role_ids: list[int] = field(default_factory=list)
+
+    # 権限不足・ロール階層によりスキップしたもの
+    unmanageable_role_ids: list[int] = field(default_factory=list)
+    unmanageable_nick_count: int = 0
+    cached_failure_count: int = 0
+
+    # 計画作成時点でキューに残っていたニックネーム変更
+    pending_nick_count: int = 0
+
+    # フェーズ名 -> 所要時間(秒)
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def measure(self, phase: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] = time.perf_counter() - started
+
+
+@lru_cache(maxsize=4096)
+def format_nick(usernames: tuple[str, ...]) -> str:
+    """
+    連携しているWikidotアカウント名からニックネームを作成する
+    複数のwikidotアカウントが連携されている場合は、すべてのアカウントを"/"で連結
+    """
+    nick = "/".join(usernames)
+
+    # nickが30文字以上の場合は27で切って"..."を付ける
+    if len(nick) > 30:
+        nick = nick[:27] + "..."
+
+    return nick
+
+
 class LinkerUtility:
     def __init__(self):
         settings = get_settings()
@@ -244,6 +301,11 @@ class StartFlowView(discord.ui.View):
             await interaction.followup.send("エラーが発生しました。", ephemeral=True)
             return
 
+        # 最新の連携情報でロール・ニックネームを即時反映
+        linker_cog = interaction.client.get_cog("Linker")
+        if linker_cog is not None:
+            await linker_cog.sync_user(interaction.user, resp)
+
         wikidot = resp.wikidot
 
         if len(wikidot) == 0:
@@ -270,11 +332,68 @@ class Linker(commands.Cog):
         self.bot = bot
         self.logger = logging.getLogger("Linker")
 
+        # 権限不足・ロール階層で失敗した操作を再試行しないためのキャッシュ
+        self.forbidden_cache = NegativeCache()
+
+        # ニックネームはロールの反映を待たせないよう、別キューで順に反映する
+        self.nick_queue = NickSyncQueue(
+            interval=get_settings().LINKER_NICK_EDIT_INTERVAL,
+            on_forbidden=lambda member: self.forbidden_cache.add(
+                member.guild.id, member.id, "nick"
+            ),
+        )
+
+    def cog_unload(self):
+        self.nick_queue.close()
+
     @commands.Cog.listener()
     async def on_ready(self):
         self.bot.add_view(StartFlowView())
+        with db_session() as session:
+            crud_guild.warm(session)
         self.update_roles.start()
 
+    # ロール・順序が変わった場合は失敗キャッシュを破棄する
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.nick != after.nick:
+            self.nick_queue.observe(after)
+
+        if before.roles == after.roles:
+            return
+
+        if after.id == self.bot.user.id:
+            # Bot自身のロールが変わった場合はギルド全体が対象
+            self.forbidden_cache.invalidate_guild(after.guild.id)
+        else:
+            self.forbidden_cache.invalidate_member(after.guild.id, after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        self.forbidden_cache.invalidate_guild(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.forbidden_cache.invalidate_guild(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.position != after.position or before.permissions != after.permissions:
+            self.forbidden_cache.invalidate_guild(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        self.nick_queue.forget(member.guild.id, member.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.nick_queue.forget(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        if before.owner_id != after.owner_id:
+            self.forbidden_cache.invalidate_guild(after.id)
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         if not self.update_roles.is_running():
@@ -329,18 +448,12 @@ class Linker(commands.Cog):
             return
 
         with db_session() as session:
-            guild = session.execute(select(Guild).where(Guild.guild_id == ctx.guild.id))
-            guild = guild.scalar()
-
-            if guild is None:
-                guild = Guild(guild_id=ctx.guild.id)
-                session.add(guild)
-                session.commit()
+            guild_pk = crud_guild.get_or_create_id(session, ctx.guild.id)
 
             # guild.registered_rolesの中から検索
             registered_role = session.execute(
                 select(RegisteredRole).where(
-                    RegisteredRole.guild_id == guild.id,
+                    RegisteredRole.guild_id == guild_pk,
                     RegisteredRole.role_id == role.id,
                 )
             )
@@ -349,7 +462,7 @@ class Linker(commands.Cog):
             if registered_role is None:
                 registered_role = RegisteredRole(
                     role_id=role.id,
-                    guild_id=guild.id,
+                    guild_id=guild_pk,
                     is_linked=is_linked,
                     is_jp_member=is_jp_member,
                 )
@@ -372,17 +485,16 @@ class Linker(commands.Cog):
         await ctx.interaction.response.defer(ephemeral=True)
 
         with db_session() as session:
-            guild = session.execute(select(Guild).where(Guild.guild_id == ctx.guild.id))
-            guild = guild.scalar()
+            guild_pk = crud_guild.get_id(session, ctx.guild.id)
 
-            if guild is None:
+            if guild_pk is None:
                 await ctx.interaction.followup.send(
                     "登録されているロールはありません。"
                 )
                 return
 
             registered_roles = session.execute(
-                select(RegisteredRole).where(RegisteredRole.guild_id == guild.id)
+                select(RegisteredRole).where(RegisteredRole.guild_id == guild_pk)
             )
             registered_roles = registered_roles.scalars().all()
 
@@ -412,10 +524,9 @@ class Linker(commands.Cog):
         await ctx.interaction.response.defer(ephemeral=True)
 
         with db_session() as session:
-            guild = session.execute(select(Guild).where(Guild.guild_id == ctx.guild.id))
-            guild = guild.scalar()
+            guild_pk = crud_guild.get_id(session, ctx.guild.id)
 
-            if guild is None:
+            if guild_pk is None:
                 await ctx.interaction.followup.send(
                     "登録されているロールはありません。"
                 )
@@ -423,7 +534,7 @@ class Linker(commands.Cog):
 
             registered_role = session.execute(
                 select(RegisteredRole).where(
-                    RegisteredRole.guild_id == guild.id,
+                    RegisteredRole.guild_id == guild_pk,
                     RegisteredRole.role_id == role.id,
                 )
             )
@@ -439,161 +550,394 @@ class Linker(commands.Cog):
             session.commit()
             await ctx.interaction.followup.send(f"{role.name} を削除しました。")
 
-    async def update_roles_in_guild(
-        self, guild: discord.Guild, update_nick: bool = False
-    ):
-        # guildに紐づいたロールを取得
-        with db_session() as session:
-            guild_db = session.execute(
-                select(Guild)
-                .options(selectinload(Guild.registered_roles))
-                .where(Guild.guild_id == guild.id)
-            )
-            guild_db = guild_db.scalar()
+    def _load_sync_settings(
+        self, guild_ids: list[int], update_nick: bool
+    ) -> dict[int, tuple[list[tuple[int, Optional[bool], Optional[bool]]], bool]]:
+        """
+        guild_id -> (登録ロール一覧, ニックネーム更新対象か) を取得する
+        DBに登録されていないギルド・同期するものがない（登録ロールがなく、
+        ニックネーム更新対象でもない）ギルドは含まれない
+        """
+        if not guild_ids:
+            return {}
 
-            if guild_db is None:
-                return
+        with db_session() as session:
+            guild_pks = crud_guild.get_ids(session, guild_ids)
+            if not guild_pks:
+                return {}
+
+            # Guild.id -> 登録ロール一覧
+            roles_by_pk: dict[int, list[tuple[int, Optional[bool], Optional[bool]]]] = {
+                guild_pk: [] for guild_pk in guild_pks.values()
+            }
+            for role in session.execute(
+                select(RegisteredRole).where(
+                    RegisteredRole.guild_id.in_(roles_by_pk.keys())
+                )
+            ).scalars():
+                roles_by_pk[role.guild_id].append(
+                    (role.role_id, role.is_linked, role.is_jp_member)
+                )
 
-            is_nick_update_target = (
-                update_nick
-                and session.execute(
-                    select(NickUpdateTargetGuild).where(
-                        NickUpdateTargetGuild.guild_id == guild.id
+            nick_target_ids = set()
+            if update_nick:
+                nick_target_ids = set(
+                    session.execute(
+                        select(NickUpdateTargetGuild.guild_id).where(
+                            NickUpdateTargetGuild.guild_id.in_(guild_ids)
+                        )
                     )
-                ).scalar()
-                is not None
-            )
+                    .scalars()
+                    .all()
+                )
 
-            # guild内のメンバーのIDを取得
+            return {
+                guild_id: (roles_by_pk[guild_pk], guild_id in nick_target_ids)
+                for guild_id, guild_pk in guild_pks.items()
+                if roles_by_pk[guild_pk] or guild_id in nick_target_ids
+            }
+
+    async def build_sync_plan(
+        self, guild: discord.Guild, update_nick: bool = False
+    ) -> Optional[SyncPlan]:
+        """Discordへ書き込まずに、同期で行う変更の一覧を作成する"""
+        plan = SyncPlan(guild_id=guild.id)
+
+        # guildに紐づいたロールを取得
+        sync_settings = self._load_sync_settings([guild.id], update_nick)
+        if guild.id not in sync_settings:
+            return None
+        registered_roles, is_nick_update_target = sync_settings[guild.id]
+
+        # guild内のメンバーを取得
+        with plan.measure("member_fetch"):
             members = await guild.fetch_members().flatten()
-            member_ids = [member.id for member in members if not member.bot]
+            humans = [member for member in members if not member.bot]
+
+            # 取得したメンバーでロールの逆引きインデックスを作り直す
+            role_member_index.rebuild(guild, members)
 
-            # linker APIでリストを取得
+        # linker APIでリストを取得
+        with plan.measure("panopticon_resolve"):
             linker_util = LinkerUtility()
-            members_list = [guild.get_member(member_id) for member_id in member_ids]
-            # Noneを除外（get_memberがNoneを返す可能性があるため）
-            members_list = [m for m in members_list if m is not None]
-            resp = await linker_util.list_accounts(members_list)
+            resp = await linker_util.list_accounts(humans)
 
-            if resp is None:
-                return
+        if resp is None:
+            return None
 
-            # 仕分け
-            linker_linked_members = []
-            linker_linked_jp_members = []
-            linker_linked_non_jp_members = []
+        with plan.measure("diff"):
+            self._diff(
+                plan, guild, registered_roles, members, resp, is_nick_update_target
+            )
 
-            nick_update_target = []
+        return plan
 
-            for data in resp.values():
-                # discord_idを取得
-                _d_id = int(data.discord_id)
+    def _diff(
+        self,
+        plan: SyncPlan,
+        guild: discord.Guild,
+        registered_roles: list[tuple[int, Optional[bool], Optional[bool]]],
+        members: list[discord.Member],
+        resp: dict[str, LinkedAccountInfo],
+        is_nick_update_target: bool,
+        scope_ids: Optional[set[int]] = None,
+    ):
+        """
+        連携情報と現在のロールから、付与・削除・ニックネーム変更をplanに積む
+        scope_idsを指定した場合は、そのメンバー以外のロールは削除しない
+        """
+        member_ids = [member.id for member in members if not member.bot]
+
+        # 仕分け
+        linker_linked_members = set()
+        linker_linked_jp_members = set()
+        linker_linked_non_jp_members = set()
+
+        nick_update_target = []
+
+        for data in resp.values():
+            # discord_idを取得
+            _d_id = int(data.discord_id)
+
+            # wikidotアカウントが存在しない場合
+            if len(data.wikidot) == 0:
+                continue
+
+            # JPメンバ判定
+            is_jp_member = any(w.is_jp_member for w in data.wikidot)
+
+            # idを集合に投入
+            linker_linked_members.add(_d_id)
+            if is_jp_member:
+                linker_linked_jp_members.add(_d_id)
+            else:
+                linker_linked_non_jp_members.add(_d_id)
 
-                # wikidotアカウントが存在しない場合
-                if len(data.wikidot) == 0:
-                    continue
+            if is_nick_update_target:
+                # discord idとwikidot user nameのペアを作成
+                nick_update_target.append(
+                    (_d_id, format_nick(tuple(w.username for w in data.wikidot)))
+                )
 
-                # JPメンバ判定
-                is_jp_member = False
-                for w in data.wikidot:
-                    if w.is_jp_member:
-                        is_jp_member = True
-                        break
-
-                # idを配列に投入
-                linker_linked_members.append(_d_id)
-                if is_jp_member:
-                    linker_linked_jp_members.append(_d_id)
-                else:
-                    linker_linked_non_jp_members.append(_d_id)
-
-                if is_nick_update_target:
-                    # discord idとwikidot user nameのペアを作成
-                    # 複数のwikidotアカウントが連携されている場合は、すべてのアカウントを"/"で連結
-                    nick_update_target.append(
-                        (_d_id, str("/".join([w.username for w in data.wikidot])))
-                    )
+        # linker_linked_membersに含まれないメンバーをunknownに追加
+        linker_unknown_members = set(member_ids) - linker_linked_members
 
-            # linker_linked_membersに含まれないメンバーをunknownに追加
-            linker_unknown_members = [
-                member_id
-                for member_id in member_ids
-                if member_id not in linker_linked_members
-            ]
+        plan.member_count = len(member_ids)
+        plan.linked_count = len(linker_linked_members)
+        plan.jp_member_count = len(linker_linked_jp_members)
 
-            member_dict = {member.id: member for member in members}
+        member_dict = {member.id: member for member in members}
 
-            # ロールの付与
-            for role in guild_db.registered_roles:
-                role_obj = guild.get_role(role.role_id)
+        # Botのロール階層・権限を事前に確認
+        bot_member = guild.me
+        can_manage_roles = bot_member.guild_permissions.manage_roles
+        can_manage_nicks = bot_member.guild_permissions.manage_nicknames
 
-                self.logger.info(f"Role: {role.role_id} in {guild.name}")
+        for role_id, is_linked, is_jp_member in registered_roles:
+            role_obj = guild.get_role(role_id)
 
-                if role_obj is None:
-                    await DiscordUtil.notify_to_owner(
-                        self.bot, f"Role not found: {role.role_id} in {guild.name}"
-                    )
-                    continue
+            if role_obj is None:
+                plan.missing_role_ids.append(role_id)
+                continue
+
+            # Botより高位のロールは操作できない
+            if not can_manage_roles or role_obj >= bot_member.top_role:
+                plan.unmanageable_role_ids.append(role_id)
+                continue
 
-                target_user_ids = []
-                # is_linkedがNone / is_jp_memberがNone = 全員
-                if role.is_linked is None and role.is_jp_member is None:
-                    target_user_ids = member_ids
+            target_user_ids = set()
+            # is_linkedがNone / is_jp_memberがNone = 全員
+            if is_linked is None and is_jp_member is None:
+                target_user_ids = set(member_ids)
 
-                # is_linkedがTrue / is_jp_memberがTrue = 連携済みJPメンバー
-                elif role.is_linked is True and role.is_jp_member is True:
-                    target_user_ids = linker_linked_jp_members
+            # is_linkedがTrue / is_jp_memberがTrue = 連携済みJPメンバー
+            elif is_linked is True and is_jp_member is True:
+                target_user_ids = linker_linked_jp_members
 
-                # is_linkedがTrue / is_jp_memberがFalse = 連携済み非JPメンバー
-                elif role.is_linked is True and role.is_jp_member is False:
-                    target_user_ids = linker_linked_non_jp_members
+            # is_linkedがTrue / is_jp_memberがFalse = 連携済み非JPメンバー
+            elif is_linked is True and is_jp_member is False:
+                target_user_ids = linker_linked_non_jp_members
 
-                # is_linkedがTrue / is_jp_memberがNone = 連携済み
-                elif role.is_linked is True and role.is_jp_member is None:
-                    target_user_ids = linker_linked_members
+            # is_linkedがTrue / is_jp_memberがNone = 連携済み
+            elif is_linked is True and is_jp_member is None:
+                target_user_ids = linker_linked_members
 
-                # is_linkedがFalse = 未連携
-                elif role.is_linked is False:
-                    target_user_ids = linker_unknown_members
+            # is_linkedがFalse = 未連携
+            elif is_linked is False:
+                target_user_ids = linker_unknown_members
 
-                for member_id in target_user_ids:
-                    member = member_dict.get(member_id)
-                    if member is None:
+            role_holder_ids = role_member_index.member_ids(guild, role_id)
+            if scope_ids is not None:
+                role_holder_ids &= scope_ids
+
+            adds = []
+            for member_id in target_user_ids:
+                member = member_dict.get(member_id)
+                if member is None:
+                    continue
+
+                if member_id not in role_holder_ids:
+                    if self.forbidden_cache.contains(
+                        guild.id, member.id, f"add_role:{role_id}"
+                    ):
+                        plan.cached_failure_count += 1
                         continue
+                    adds.append(member)
+
+            # 付与対象から外れたメンバーについてはロールを削除
+            removes = []
+            for member_id in role_holder_ids - target_user_ids:
+                member = member_dict.get(member_id)
+                if member is None:
+                    continue
+                if self.forbidden_cache.contains(
+                    guild.id, member.id, f"remove_role:{role_id}"
+                ):
+                    plan.cached_failure_count += 1
+                    continue
+                removes.append(member)
+
+            plan.role_adds[role_id] = adds
+            plan.role_removes[role_id] = removes
+
+        # ニックネームの更新
+        for member_id, nick in nick_update_target:
+            member = member_dict.get(member_id)
+            if member is None:
+                continue
+
+            if not self.nick_queue.needs_update(member, nick):
+                continue
+
+            # サーバーオーナーとBot以上のロールを持つメンバーは変更できない
+            if (
+                not can_manage_nicks
+                or member.id == guild.owner_id
+                or member.top_role >= bot_member.top_role
+            ):
+                plan.unmanageable_nick_count += 1
+                continue
+
+            if self.forbidden_cache.contains(guild.id, member.id, "nick"):
+                plan.cached_failure_count += 1
+                continue
 
-                    if role_obj not in member.roles:
+            plan.nick_edits.append((member, nick))
+
+    async def apply_sync_plan(
+        self, guild: discord.Guild, plan: SyncPlan, report: bool = True
+    ):
+        """
+        build_sync_planで作成した計画をDiscordへ反映する
+        report=Falseの場合、オーナーへの通知・失敗キャッシュへの記録を行わない
+        （1ユーザの同期用。定期同期で報告されるため）
+        """
+        plan.pending_nick_count = self.nick_queue.pending_count(guild.id)
+
+        with plan.measure("apply"):
+            if report:
+                for role_id in plan.missing_role_ids:
+                    await DiscordUtil.notify_to_owner(
+                        self.bot, f"Role not found: {role_id} in {guild.name}"
+                    )
+
+            # ロールの付与・削除
+            for role_id, adds in plan.role_adds.items():
+                role_obj = guild.get_role(role_id)
+                if role_obj is None:
+                    continue
+
+                self.logger.info(f"Role: {role_id} in {guild.name}")
+
+                for member in adds:
+                    try:
                         await member.add_roles(role_obj)
+                    except discord.Forbidden:
+                        if report:
+                            self.forbidden_cache.add(
+                                guild.id, member.id, f"add_role:{role_id}"
+                            )
+                        self.logger.info(
+                            f"Failed to add role {role_id} to {member.name} in {guild.name}"
+                        )
 
-                # 付与対象から外れたメンバーについてはロールを削除
-                for member in role_obj.members:
-                    if member.id not in target_user_ids:
+                for member in plan.role_removes.get(role_id, []):
+                    try:
                         await member.remove_roles(role_obj)
+                    except discord.Forbidden:
+                        if report:
+                            self.forbidden_cache.add(
+                                guild.id, member.id, f"remove_role:{role_id}"
+                            )
+                        self.logger.info(
+                            f"Failed to remove role {role_id} from {member.name} in {guild.name}"
+                        )
+
+            # ニックネームの更新はキューに積み、ギルドごとに間隔を空けて反映する
+            for member, nick in plan.nick_edits:
+                self.nick_queue.enqueue(member, nick)
+
+    async def sync_user(
+        self, user: discord.User | discord.Member, account: LinkedAccountInfo
+    ) -> list[SyncPlan]:
+        """
+        1ユーザのロール・ニックネームを、Botと共通の全ギルドで即時に同期する
+        accountにはrecheck_flowで取得した最新の連携情報を渡す
+        """
+        guilds = [guild for guild in self.bot.guilds if guild.get_member(user.id)]
+        sync_settings = self._load_sync_settings(
+            [guild.id for guild in guilds], update_nick=True
+        )
 
-            # ニックネームの更新
-            if is_nick_update_target:
-                for member_id, nick in nick_update_target:
-                    member = member_dict.get(member_id)
-                    if member is None:
-                        continue
+        plans = []
+        for guild in guilds:
+            if guild.id not in sync_settings:
+                continue
+
+            member = guild.get_member(user.id)
+            if member is None or member.bot:
+                continue
+
+            registered_roles, is_nick_update_target = sync_settings[guild.id]
+            plan = SyncPlan(guild_id=guild.id)
+
+            try:
+                with plan.measure("diff"):
+                    self._diff(
+                        plan,
+                        guild,
+                        registered_roles,
+                        [member],
+                        {account.discord_id: account},
+                        is_nick_update_target,
+                        scope_ids={member.id},
+                    )
+                await self.apply_sync_plan(guild, plan, report=False)
+            except Exception as e:
+                self.logger.error(f"Failed to sync {user.name} in {guild.name}: {e}")
+                continue
 
-                    # nickが30文字以上の場合は27で切って"..."を付ける
-                    if len(nick) > 30:
-                        nick = nick[:27] + "..."
+            plans.append(plan)
 
-                    if member.nick != nick:
-                        try:
-                            await member.edit(nick=nick)
-                        except discord.Forbidden:
-                            self.logger.info(
-                                f"Failed to update nickname for {member.name} in {guild.name}"
-                            )
-                            continue
+        return plans
+
+    async def update_roles_in_guild(
+        self, guild: discord.Guild, update_nick: bool = False, dry_run: bool = False
+    ) -> Optional[SyncPlan]:
+        plan = await self.build_sync_plan(guild, update_nick=update_nick)
+
+        if plan is None:
+            return None
+
+        if not dry_run:
+            await self.apply_sync_plan(guild, plan)
+
+        return plan
+
+    @staticmethod
+    def format_sync_report(plan: SyncPlan, dry_run: bool) -> str:
+        lines = [
+            "### ロール同期計画（変更は適用されていません）"
+            if dry_run
+            else "### ロールの強制更新を行いました",
+            f"対象メンバー: {plan.member_count}名"
+            f"（連携済み {plan.linked_count} / JPメンバ {plan.jp_member_count}）",
+            "",
+            "**ロール別の変更数**",
+        ]
+
+        for role_id, adds in plan.role_adds.items():
+            removes = plan.role_removes.get(role_id, [])
+            lines.append(f"<@&{role_id}>: 付与 {len(adds)} / 削除 {len(removes)}")
+
+        for role_id in plan.missing_role_ids:
+            lines.append(f"<@&{role_id}>: ロールが見つかりません")
+
+        for role_id in plan.unmanageable_role_ids:
+            lines.append(f"<@&{role_id}>: Botより高位または権限不足のためスキップ")
+
+        lines += [
+            f"**ニックネーム変更**: {len(plan.nick_edits)}件"
+            f"（階層によりスキップ {plan.unmanageable_nick_count}件）",
+            f"**ニックネーム反映待ち**: {plan.pending_nick_count}件",
+            f"**過去の失敗によりスキップ**: {plan.cached_failure_count}件",
+            "",
+            "**フェーズ別所要時間**",
+        ]
+        for phase, elapsed in plan.timings.items():
+            lines.append(f"{phase}: {elapsed:.2f}s")
+
+        report = "\n".join(lines)
+        if len(report) > 2000:
+            report = report[:1997] + "..."
+        return report
 
     @tasks.loop(minutes=15)
     async def update_roles(self):
-        for guild in self.bot.guilds:
-            self.logger.info(f"Updating roles in {guild.name}")
-            await self.update_roles_in_guild(guild, update_nick=True)
+        with background_priority():
+            for guild in self.bot.guilds:
+                self.logger.info(f"Updating roles in {guild.name}")
+                await self.update_roles_in_guild(guild, update_nick=True)
 
     @update_roles.before_loop
     async def before_update_roles(self):
@@ -605,10 +949,22 @@ class Linker(commands.Cog):
         self,
         ctx: discord.commands.context.ApplicationContext,
         nick: discord.Option(bool, "ニックネーム更新の要否", default=False),
+        dry_run: discord.Option(
+            bool, "変更を適用せず、計画と所要時間のみ表示する", default=False
+        ),
     ):
         await ctx.interaction.response.defer(ephemeral=True)
-        await self.update_roles_in_guild(ctx.guild, update_nick=nick)
-        await ctx.interaction.followup.send("ロールの強制更新を行いました。")
+        plan = await self.update_roles_in_guild(
+            ctx.guild, update_nick=nick, dry_run=dry_run
+        )
+
+        if plan is None:
+            await ctx.interaction.followup.send(
+                "同期対象の情報を取得できませんでした。"
+            )
+            return
+
+        await ctx.interaction.followup.send(self.format_sync_report(plan, dry_run))
 
     @slash_command(
         name="check_info_from_discord",
@@ -665,6 +1021,9 @@ class Linker(commands.Cog):
             await ctx.interaction.followup.send("エラーが発生しました。")
             return
 
+        # 最新の連携情報でロール・ニックネームを即時反映
+        await self.sync_user(user, resp)
+
         wikidot = resp.wikidot
 
         if len(wikidot) == 0:
@@ -1,14 +1,21 @@
 import logging
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 from core import get_settings
 from db import db_session
+from db.crud.job import schedule_job
 from db.models import SiteApplicationNotifyChannel, SiteApplication
 from ui.views import member_management as views
+from utils.job_queue import job_registry
 from utils.panopticon_client import PanopticonClient
+from utils.panopticon_rate_limit import background_priority
+
+# jobsテーブルのジョブの種類
+CHECK_APPLICATIONS_JOB_KIND = "member_management.check_applications"
 
 
 class MemberManagement(commands.Cog):
@@ -26,6 +33,14 @@ class MemberManagement(commands.Cog):
         else:
             self.panopticon: Optional[PanopticonClient] = None
 
+        # 参加申請の監視はjobsテーブル経由で実行する（複数インスタンスでも1か所でのみ実行される）
+        if self.panopticon is not None:
+            job_registry.register(
+                CHECK_APPLICATIONS_JOB_KIND,
+                self.check_site_applications,
+                interval=timedelta(minutes=10),
+            )
+
     # ==============================
     # イベントハンドラ
     # ==============================
@@ -35,12 +50,6 @@ class MemberManagement(commands.Cog):
         self.bot.add_view(views.ApplicationActionButtons())
         self.bot.add_view(views.ApplicationAcceptConfirmationButtons())
         self.bot.add_view(views.ApplicationHandlingStatusButtons())
-        self.check_site_applications.start()
-
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if not self.check_site_applications.is_running():
-            self.check_site_applications.start()
 
     # ==============================
     # Cog全体のサブコマンド
@@ -169,94 +178,92 @@ class MemberManagement(commands.Cog):
             )
 
     # ===== 参加申請の処理系 =====
-    @tasks.loop(minutes=10)
-    async def check_site_applications(self):
+    async def check_site_applications(self, payload: dict):
         """
-        参加申請を監視し、新しい申請があれば通知します
+        参加申請を監視し、新しい申請があれば通知します（10分ごとのジョブ）
         """
-        if self.panopticon is None:
-            return
-
         with db_session() as session:
             channels = session.query(SiteApplicationNotifyChannel).all()
             for channel in channels:
-                site_unix_name = channel.site_unix_name
                 try:
-                    # status=0 は PENDING
-                    pending_applications, _ = await self.panopticon.get_applications(
-                        site_unix_name=site_unix_name, status=0
-                    )
+                    with background_priority():
+                        await self._notify_pending_applications(session, channel)
                 except Exception as e:
-                    self.logger.error(f"Failed to get applications: {e}")
+                    self.logger.error(
+                        f"Failed to check applications for {channel.site_unix_name}: {e}"
+                    )
+
+    async def _notify_pending_applications(
+        self, session, channel: SiteApplicationNotifyChannel
+    ):
+        """チャンネルに紐づくサイトの未通知の参加申請を通知します"""
+        site_unix_name = channel.site_unix_name
+
+        # status=0 は PENDING
+        # 全ページを順に取得し、未通知の申請を通知する
+        async for pending in self.panopticon.iter_applications(
+            site_unix_name=site_unix_name, status=0
+        ):
+            # original_idで検索
+            exist_entry = (
+                session.query(SiteApplication)
+                .filter_by(
+                    original_id=pending.id,
+                    site_unix_name=site_unix_name,
+                )
+                .first()
+            )
+            if exist_entry is None:
+                # メッセージ送信
+                guild_obj = self.bot.get_guild(channel.guild_id)
+                if guild_obj is None:
+                    continue
+                channel_obj = guild_obj.get_channel(channel.channel_id)
+                if channel_obj is None:
                     continue
 
-                for pending in pending_applications:
-                    # original_idで検索
-                    exist_entry = (
-                        session.query(SiteApplication)
-                        .filter_by(
-                            original_id=pending.id,
-                            site_unix_name=site_unix_name,
-                        )
-                        .first()
+                application_text = pending.text or ""
+                correct_password = pending.correctPassword
+
+                # 正しい合言葉が含まれていたら太字にする
+                display_text = application_text
+                if correct_password and correct_password in application_text:
+                    display_text = application_text.replace(
+                        correct_password, f"**{correct_password}**"
+                    )
+
+                embed = discord.Embed(title="参加申請", color=discord.Color.yellow())
+                embed.set_author(
+                    name=pending.user.name,
+                    url=f"https://www.wikidot.com/user:info/{pending.user.unixName}",
+                    icon_url=pending.user.avatarUrl or "",
+                )
+                embed.set_footer(text=f"{pending.id}")
+                embed.add_field(
+                    name="メッセージ",
+                    value=display_text or "（メッセージなし）",
+                    inline=False,
+                )
+                embed.add_field(
+                    name="正しい合言葉",
+                    value=f"`{correct_password}`" if correct_password else "（未設定）",
+                    inline=False,
+                )
+
+                await channel_obj.send(
+                    f"### 【{site_unix_name}】参加申請を受け取りました",
+                    embed=embed,
+                    view=views.ApplicationActionButtons(),
+                )
+
+                # DBに登録
+                session.add(
+                    SiteApplication(
+                        original_id=pending.id,
+                        site_unix_name=site_unix_name,
                     )
-                    if exist_entry is None:
-                        # メッセージ送信
-                        guild_obj = self.bot.get_guild(channel.guild_id)
-                        if guild_obj is None:
-                            continue
-                        channel_obj = guild_obj.get_channel(channel.channel_id)
-                        if channel_obj is None:
-                            continue
-
-                        application_text = pending.text or ""
-                        correct_password = pending.correctPassword
-
-                        # 正しい合言葉が含まれていたら太字にする
-                        display_text = application_text
-                        if correct_password and correct_password in application_text:
-                            display_text = application_text.replace(
-                                correct_password, f"**{correct_password}**"
-                            )
-
-                        embed = discord.Embed(
-                            title="参加申請", color=discord.Color.yellow()
-                        )
-                        embed.set_author(
-                            name=pending.user.name,
-                            url=f"https://www.wikidot.com/user:info/{pending.user.unixName}",
-                            icon_url=pending.user.avatarUrl or "",
-                        )
-                        embed.set_footer(text=f"{pending.id}")
-                        embed.add_field(
-                            name="メッセージ",
-                            value=display_text or "（メッセージなし）",
-                            inline=False,
-                        )
-                        embed.add_field(
-                            name="正しい合言葉",
-                            value=f"`{correct_password}`" if correct_password else "（未設定）",
-                            inline=False,
-                        )
-
-                        await channel_obj.send(
-                            f"### 【{site_unix_name}】参加申請を受け取りました",
-                            embed=embed,
-                            view=views.ApplicationActionButtons(),
-                        )
-
-                        # DBに登録
-                        session.add(
-                            SiteApplication(
-                                original_id=pending.id,
-                                site_unix_name=site_unix_name,
-                            )
-                        )
-                        session.commit()
-
-    @check_site_applications.before_loop
-    async def before_check_site_applications(self):
-        await self.bot.wait_until_ready()
+                )
+                session.commit()
 
     @group_application.command(
         name="force_check", description="参加申請の強制チェックを行います"
@@ -264,7 +271,19 @@ class MemberManagement(commands.Cog):
     @commands.is_owner()
     async def force_check_site_applications(self, ctx: discord.ApplicationContext):
         await ctx.response.defer(ephemeral=True)
-        self.check_site_applications.restart()
+
+        if self.panopticon is None:
+            await ctx.followup.send(":x: APIが設定されていません", ephemeral=True)
+            return
+
+        # 定期ジョブの実行予定時刻を現在時刻に変更する
+        with db_session() as session:
+            schedule_job(
+                session,
+                CHECK_APPLICATIONS_JOB_KIND,
+                run_at=datetime.now(timezone.utc),
+                dedupe_key=CHECK_APPLICATIONS_JOB_KIND,
+            )
         await ctx.followup.send(
             ":white_check_mark: 強制チェックを開始します", ephemeral=True
         )
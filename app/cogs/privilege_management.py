@@ -1,16 +1,22 @@
 import logging
-from datetime import datetime
 from typing import Optional
 
 import discord
 import httpx
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 from core import get_settings
 from db.connection import db_session
 from db.models.privilege_management import PrivilegeRemoveQueue
-from ui.views.privilege_management import GetPrivilegeButton, PrivilegeRemoveButton
+from ui.views.privilege_management import (
+    REVOKE_JOB_KIND,
+    GetPrivilegeButton,
+    PrivilegeRemoveButton,
+)
+from utils.discord import DiscordUtil
+from utils.job_queue import job_registry
 from utils.panopticon_client import PanopticonClient
+from utils.panopticon_rate_limit import background_priority
 
 
 class PrivilegeManagement(commands.Cog):
@@ -28,6 +34,10 @@ class PrivilegeManagement(commands.Cog):
         else:
             self.panopticon: Optional[PanopticonClient] = None
 
+        # 権限剥奪はjobsテーブル経由で実行する（APIが未設定の間はジョブを残しておく）
+        if self.panopticon is not None:
+            job_registry.register(REVOKE_JOB_KIND, self.revoke_privilege)
+
     # ==============================
     # イベントハンドラ
     # ==============================
@@ -37,14 +47,6 @@ class PrivilegeManagement(commands.Cog):
         self.bot.add_view(GetPrivilegeButton())
         self.bot.add_view(PrivilegeRemoveButton())
 
-        # タスクの開始
-        self.privilege_remover.start()
-
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if not self.privilege_remover.is_running():
-            self.privilege_remover.start()
-
     # ==============================
     # Cog全体のサブコマンド
     # ==============================
@@ -81,62 +83,49 @@ class PrivilegeManagement(commands.Cog):
     # タスク
     # ==============================
 
-    @tasks.loop(minutes=1)
-    async def privilege_remover(self):
-        if self.panopticon is None:
-            return
-
+    async def revoke_privilege(self, payload: dict):
+        """
+        権限剥奪ジョブ（権限昇格から1時間後に実行される）
+        """
         with db_session() as session:
-            # expired_atが過ぎた権限剥奪リクエストを取得
-            expired_queues = (
-                session.query(PrivilegeRemoveQueue)
-                .filter(PrivilegeRemoveQueue.expired_at <= datetime.now())
-                .all()
-            )
-
-            for queue in expired_queues:
-                user = None
-                message = None
-                try:
-                    # get instances
-                    user = self.bot.get_user(queue.dc_user_id)
-                    guild = self.bot.get_guild(queue.notify_guild_id)
-                    if guild is None:
-                        continue
-                    channel = guild.get_channel(queue.notify_channel_id)
-                    if channel is None:
-                        continue
-                    message = await channel.fetch_message(queue.notify_message_id)
-
-                    # remove privilege (action="revoke")
+            queue = session.get(PrivilegeRemoveQueue, payload["queue_id"])
+            # 手動で削除済み
+            if queue is None:
+                return
+
+            try:
+                # remove privilege (action="revoke")
+                with background_priority():
                     await self.panopticon.change_privilege(
                         site_unix_name=queue.wd_site_unix_name,
                         user_id=queue.wd_user_id,
                         action="revoke",
                     )
-                except httpx.HTTPStatusError as e:
-                    try:
-                        json = e.response.json()
-                        if "User is not moderator/admin:" in json.get("message", ""):
-                            pass
-                    except Exception:
-                        pass
-                except Exception as e:
-                    self.logger.error(f"Failed to revoke privilege: {e}")
-
-                finally:
-                    # notify message
-                    if message and user:
-                        await message.reply(
-                            f"{user.mention} 権限を削除しました",
-                            delete_after=5,
-                        )
-                        # delete message
-                        await message.delete(delay=5)
-
-                    # delete queue
-                    session.delete(queue)
-                    session.commit()
+            except httpx.HTTPStatusError as e:
+                # 既に権限がない場合など、再試行しても結果が変わらないものは完了扱い
+                self.logger.warning(f"Failed to revoke privilege: {e}")
+            # 通信エラーなどはジョブごと再試行する
+
+            # notify message
+            message = DiscordUtil.get_partial_message(
+                self.bot,
+                queue.notify_channel_id,
+                queue.notify_message_id,
+                guild_id=queue.notify_guild_id,
+            )
+            try:
+                await message.reply(
+                    f"<@{queue.dc_user_id}> 権限を削除しました",
+                    delete_after=5,
+                )
+                # delete message
+                await message.delete(delay=5)
+            except discord.HTTPException as e:
+                self.logger.warning(f"Failed to notify privilege removal: {e}")
+
+            # delete queue
+            session.delete(queue)
+            session.commit()
 
 
 def setup(bot):
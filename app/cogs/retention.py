@@ -0,0 +1,124 @@
+import asyncio
+import datetime
+import logging
+from functools import partial
+from typing import Optional
+
+import discord
+from discord.ext import commands, tasks
+from sqlalchemy import select
+
+from core import get_settings
+from db import db_session
+from db.crud.retention import (
+    archive_finished_staff_requests,
+    archive_site_applications,
+)
+from db.models import SiteApplication
+from utils.panopticon_client import PanopticonClient
+from utils.panopticon_rate_limit import background_priority
+
+
+class Retention(commands.Cog):
+    """
+    完了した稟議・通知済みの参加申請をアーカイブテーブルへ移し、定期処理が走査するテーブルを小さく保つ
+    """
+
+    def __init__(self, bot: discord.Bot):
+        self.bot = bot
+        self.settings = get_settings()
+        self.logger = logging.getLogger("discord")
+
+        if self.settings.PANOPTICON_API_URL and self.settings.PANOPTICON_API_KEY:
+            self.panopticon = PanopticonClient(
+                self.settings.PANOPTICON_API_URL,
+                self.settings.PANOPTICON_API_KEY,
+            )
+        else:
+            self.panopticon: Optional[PanopticonClient] = None
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.archiver.start()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if not self.archiver.is_running():
+            self.archiver.start()
+
+    @tasks.loop(hours=6)
+    async def archiver(self):
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        moved = await self._archive_in_batches(
+            partial(
+                archive_finished_staff_requests,
+                updated_before=now
+                - datetime.timedelta(days=self.settings.RETENTION_STAFF_REQUEST_DAYS),
+                batch_size=self.settings.RETENTION_BATCH_SIZE,
+            )
+        )
+        if moved:
+            self.logger.info(f"[Retention] Archived {moved} staff requests")
+
+        # 未処理の申請をアーカイブすると再通知されるため、Panopticonから取得できた場合のみ行う
+        if self.panopticon is None:
+            return
+
+        with db_session() as db:
+            sites = list(db.scalars(select(SiteApplication.site_unix_name).distinct()))
+
+        for site_unix_name in sites:
+            try:
+                with background_priority():
+                    pending_ids = {
+                        application.id
+                        async for application in self.panopticon.iter_applications(
+                            site_unix_name=site_unix_name, status=0
+                        )
+                    }
+            except Exception as e:
+                self.logger.warning(
+                    f"[Retention] Skip {site_unix_name}: failed to get pending applications: {e}"
+                )
+                continue
+
+            moved = await self._archive_in_batches(
+                # ループ変数は呼び出し時ではなく、この時点の値で束縛する
+                partial(
+                    archive_site_applications,
+                    site_unix_name=site_unix_name,
+                    created_before=now
+                    - datetime.timedelta(
+                        days=self.settings.RETENTION_SITE_APPLICATION_DAYS
+                    ),
+                    exclude_original_ids=pending_ids,
+                    batch_size=self.settings.RETENTION_BATCH_SIZE,
+                )
+            )
+            if moved:
+                self.logger.info(
+                    f"[Retention] Archived {moved} applications of {site_unix_name}"
+                )
+
+    async def _archive_in_batches(self, archive_batch) -> int:
+        """
+        1バッチ1トランザクションで、対象がなくなるまで繰り返す
+        ロックを短く保つため、バッチごとにcommitしてイベントループに制御を返す
+        """
+        total = 0
+        while True:
+            with db_session() as db:
+                moved = archive_batch(db)
+            total += moved
+            if moved < self.settings.RETENTION_BATCH_SIZE:
+                return total
+            await asyncio.sleep(0)
+
+    @archiver.before_loop
+    async def before_archiver(self):
+        await self.bot.wait_until_ready()
+
+
+def setup(bot):
+    return bot.add_cog(Retention(bot))
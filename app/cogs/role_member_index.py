@@ -0,0 +1,50 @@
+import logging
+
+import discord
+from discord.ext import commands
+
+from utils.role_member_index import role_member_index
+
+
+class RoleMemberIndexer(commands.Cog):
+    """
+    ゲートウェイイベントからロール -> メンバーの逆引きインデックスを更新する
+    """
+
+    def __init__(self, bot: discord.Bot):
+        self.bot = bot
+        self.logger = logging.getLogger("discord")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # 再接続時はキャッシュが作り直されるため、インデックスも遅延再構築させる
+        role_member_index.clear()
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles:
+            role_member_index.update_member(before, after)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        role_member_index.add_member(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        role_member_index.remove_member(member)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        role_member_index.add_role(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        role_member_index.remove_role(role)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        role_member_index.invalidate_guild(guild.id)
+
+
+def setup(bot):
+    return bot.add_cog(RoleMemberIndexer(bot))
@@ -1,13 +1,29 @@
 import datetime
 import logging
+from typing import Sequence
 
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
+from sqlalchemy import Row, select
 
 from core import get_settings
 from db.connection import db_session
+from db.crud.staff_request import (
+    DIGEST_JOB_KIND,
+    DUE_DATE_JOB_KIND,
+    JST,
+    REMIND_INTERVAL,
+    REMIND_JOB_KIND,
+    add_to_digest,
+    is_digest_guild,
+    remind_run_at,
+    schedule_remind,
+)
 from db.models import (
     StaffRequest as DbSr,
+    StaffRequestDigestGuild,
+    StaffRequestStatus,
+    StaffRequestUser as DbSrUser,
 )
 from ui.views.staff_request import (
     DetailsInputModal,
@@ -18,6 +34,11 @@ from ui.views.staff_request import (
     RequestSummaryController,
     RequestSummaryFinishController,
 )
+from utils.discord import DiscordUtil
+from utils.job_queue import job_registry
+
+# まとめ送信するDMの1通あたりの文字数上限（Discordの上限は2000文字）
+DIGEST_MESSAGE_LIMIT = 2000
 
 
 class StaffRequest(commands.Cog):
@@ -26,6 +47,11 @@ class StaffRequest(commands.Cog):
         self.settings = get_settings()
         self.logger = logging.getLogger("discord")
 
+        # 期限超過の通知・リマインドはjobsテーブル経由で実行する
+        job_registry.register(DUE_DATE_JOB_KIND, self.notify_due_date)
+        job_registry.register(REMIND_JOB_KIND, self.remind)
+        job_registry.register(DIGEST_JOB_KIND, self.send_digest)
+
     # ==============================
     # イベントハンドラ
     # ==============================
@@ -39,18 +65,6 @@ class StaffRequest(commands.Cog):
         self.bot.add_view(RequestSummaryController())
         self.bot.add_view(RequestSummaryFinishController())
 
-        # リマインダーの開始
-        self.remind_watcher.start()
-        self.due_date_watcher.start()
-
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if not self.remind_watcher.is_running():
-            self.remind_watcher.start()
-
-        if not self.due_date_watcher.is_running():
-            self.due_date_watcher.start()
-
     # ==============================
     # Cog全体のサブコマンド
     # ==============================
@@ -67,129 +81,169 @@ class StaffRequest(commands.Cog):
     async def request_add(self, ctx: discord.ApplicationContext):
         await ctx.send_modal(DetailsInputModal())
 
+    @group_request.command(
+        name="toggle_digest",
+        description="リマインドをユーザーごとに1通のDMにまとめて送るかを切り替えます",
+    )
+    @commands.has_permissions(administrator=True)
+    async def request_toggle_digest(self, ctx: discord.ApplicationContext):
+        await ctx.interaction.response.defer(ephemeral=True)
+
+        with db_session() as db:
+            digest_guild = db.scalar(
+                select(StaffRequestDigestGuild).where(
+                    StaffRequestDigestGuild.guild_id == ctx.guild.id
+                )
+            )
+
+            if digest_guild is None:
+                db.add(StaffRequestDigestGuild(guild_id=ctx.guild.id))
+                db.commit()
+                await ctx.interaction.followup.send(
+                    "リマインドをまとめて送信するように設定しました。"
+                )
+            else:
+                db.delete(digest_guild)
+                db.commit()
+                await ctx.interaction.followup.send(
+                    "リマインドを依頼ごとに送信するように設定しました。"
+                )
+
     # ==============================
     # タスク
     # ==============================
 
-    @tasks.loop(hours=1)
-    async def due_date_watcher(self):
-        # due_dateを過ぎたタスクをcreated_by_idに通知する
+    async def notify_due_date(self, payload: dict):
+        """
+        期限超過の通知ジョブ（期限日の翌日0時（JST）に実行される）
+        """
         with db_session() as db:
-            # 親エントリからdue_dateが過ぎた、かつis_due_date_notifiedがFalseなものを取得
-            staff_requests = (
-                db.query(DbSr)
-                .filter(
-                    DbSr.due_date < datetime.date.today(),
-                    DbSr.is_due_date_notified.is_(False),
-                )
-                .all()
+            sr = db.get(DbSr, payload["staff_request_id"])
+
+            # 通知済み・全員対応済み・アーカイブ済みの場合は何もしない
+            if sr is None or sr.is_due_date_notified or sr.pending_count == 0:
+                return
+
+            # 保存済みのIDから直接返信する（メッセージの取得は行わない）
+            # 失敗した場合はジョブごと再試行する
+            original_message = DiscordUtil.get_partial_message(
+                self.bot,
+                sr.summary_message_channel_id,
+                sr.summary_message_id,
+                guild_id=sr.summary_message_guild_id,
+            )
+            await original_message.reply(
+                f"<@{sr.created_by_id}> 依頼の期限が過ぎました\n"
             )
 
-            for sr in staff_requests:
-                # pendingなタスクがなければスキップ
-                if len(sr.pending_users) == 0:
-                    continue
+            # is_due_date_notifiedをTrueに更新
+            sr.is_due_date_notified = True
+            db.commit()
 
-                original_guild = self.bot.get_guild(sr.summary_message_guild_id)
-                if original_guild is None:
-                    self.logger.warning(
-                        f"[Staff Request] Guild {sr.summary_message_guild_id} not found"
-                    )
-                    continue
+            self.logger.info(f"[Staff Request] {sr.title} の締切超過を通知しました")
 
-                original_channel = original_guild.get_channel(
-                    sr.summary_message_channel_id
-                )
-                if original_channel is None:
-                    self.logger.warning(
-                        f"[Staff Request] Channel {sr.summary_message_channel_id} not found"
-                    )
-                    continue
-
-                author = self.bot.get_user(sr.created_by_id)
-                if author is None:
-                    self.logger.warning(
-                        f"[Staff Request] User {sr.created_by_id} not found"
-                    )
-                    continue
-
-                original_message = await original_channel.fetch_message(
-                    sr.summary_message_id
-                )
+    async def remind(self, payload: dict):
+        """
+        リマインドジョブ（稟議ごとに、作成・前回のリマインドから2日後に実行される）
+        まとめ送信するギルドの稟議は毎日DIGEST_TIMEに揃えて実行し、ユーザーごとのまとめ送信ジョブに追加する
+        """
+        with db_session() as db:
+            sr = db.get(DbSr, payload.get("staff_request_id"))
 
-                await original_message.reply(
-                    f"{author.mention} 依頼の期限が過ぎました\n"
-                )
+            # 全員対応済み・アーカイブ済みの場合は終了
+            if sr is None or sr.pending_count == 0:
+                return
 
-                # is_due_date_notifiedをTrueに更新
-                sr.is_due_date_notified = True
-                db.commit()
+            # due_dateを過ぎていれば終了
+            now = datetime.datetime.now(datetime.timezone.utc)
+            if sr.due_date is not None and sr.due_date < now.astimezone(JST).date():
+                return
+
+            is_digest = is_digest_guild(db, sr.summary_message_guild_id)
+
+            title, due_date = sr.title, sr.due_date
+            targets = [(sr_u.user_id, sr_u.dm_message_id) for sr_u in sr.pending_users]
 
-                self.logger.info(f"[Staff Request] {sr.title} の締切超過を通知しました")
+            if is_digest:
+                for user_id, _ in targets:
+                    add_to_digest(db, user_id, sr.id, now)
 
-    @tasks.loop(hours=1)
-    async def remind_watcher(self):
+            # リマインド時間を更新し、次回のリマインドを登録
+            sr.last_remind_at = now
+            schedule_remind(db, sr.id, remind_run_at(now + REMIND_INTERVAL, is_digest))
+            db.commit()
+
+        if is_digest:
+            return
+
+        # 依頼のDMを取得せずに指定し、replyでリマインド
+        msg_content = "**対応が必要な依頼があります。ご確認ください。**"
+        if due_date is not None:
+            msg_content += f"\n> 期限: {due_date.strftime('%Y/%m/%d')}"
+
+        for user_id, dm_message_id in targets:
+            try:
+                _dm_msg = await DiscordUtil.get_dm_partial_message(
+                    self.bot, user_id, dm_message_id
+                )
+                await _dm_msg.reply(msg_content)
+            except discord.HTTPException as e:
+                self.logger.warning(f"[Staff Request] Failed to remind {user_id}: {e}")
+                continue
+
+            self.logger.info(
+                f"[Staff Request] {title} のリマインドを {user_id} に送信しました"
+            )
+
+    async def send_digest(self, payload: dict):
+        """
+        まとめ送信ジョブ（同じDIGEST_TIMEにリマインドを迎えた稟議を1通にまとめる）
+        送信時点でまだ未対応のものだけを送る
+        """
+        user_id = payload["user_id"]
         with db_session() as db:
-            # 親エントリを全取得
-            staff_requests = db.query(DbSr).all()
-
-            for sr in staff_requests:
-                # pendingなタスクがなければスキップ
-                if len(sr.pending_users) == 0:
-                    continue
-
-                # due_dateを過ぎていればスキップ
-                if sr.due_date is not None and sr.due_date < datetime.date.today():
-                    continue
-
-                # last_remind_atがNone -> created_atから2日経過
-                # last_remind_atがある -> last_remind_atから2日経過
-                if sr.last_remind_at is None:
-                    remind_time = sr.created_at + datetime.timedelta(days=2)
-                else:
-                    remind_time = sr.last_remind_at + datetime.timedelta(days=2)
-
-                # 現在時刻を取得（タイムゾーン情報を一致させる）
-                now = datetime.datetime.now(datetime.timezone.utc)
-
-                # remind_timeがnaiveの場合はawareに変換
-                if remind_time.tzinfo is None:
-                    remind_time = remind_time.replace(tzinfo=datetime.timezone.utc)
-
-                # 現在時刻がリマインド時間を過ぎている場合
-                if now >= remind_time:
-                    # リマインド時間を更新
-                    sr.last_remind_at = now
-                    db.commit()
-
-                    # リマインドメッセージを送信
-                    # 対象のユーザを取得
-                    for sr_u in sr.pending_users:
-                        # DMを送信
-                        _du = self.bot.get_user(sr_u.user_id)
-                        if _du is None:
-                            self.logger.warning(
-                                f"ユーザID {sr_u.user_id} が見つかりません"
-                            )
-                            continue
-
-                        _dm = await _du.create_dm()
-
-                        # メッセージを取得
-                        _dm_msg = await _dm.fetch_message(sr_u.dm_message_id)
-
-                        msg_content = "**対応が必要な依頼があります。ご確認ください。**"
-                        if sr.due_date is not None:
-                            msg_content += (
-                                f"\n> 期限: {sr.due_date.strftime('%Y/%m/%d')}"
-                            )
-
-                        # replyでリマインド
-                        await _dm_msg.reply(msg_content)
-
-                        self.logger.info(
-                            f"[Staff Request] {sr.title} のリマインドを {_du.display_name} に送信しました"
-                        )
+            entries = db.execute(
+                select(DbSrUser.dm_message_id, DbSr.title, DbSr.due_date)
+                .join(DbSr, DbSr.id == DbSrUser.staff_request_id)
+                .where(
+                    DbSrUser.staff_request_id.in_(set(payload["staff_request_ids"])),
+                    DbSrUser.user_id == user_id,
+                    DbSrUser.status == StaffRequestStatus.PENDING,
+                )
+                .order_by(DbSr.id)
+            ).all()
+
+        if not entries:
+            return
+
+        # 失敗した場合はジョブごと再試行する
+        await self._send_digest(user_id, entries)
+
+        self.logger.info(
+            f"[Staff Request] {len(entries)}件のリマインドをまとめて {user_id} に送信しました"
+        )
+
+    async def _send_digest(self, user_id: int, entries: Sequence[Row]):
+        """
+        未対応の依頼を1通のDMにまとめて送る（各依頼のDMへのリンク付き）
+        """
+        dm = await self.bot.create_dm(discord.Object(id=user_id))
+
+        lines = [f"**対応が必要な依頼が{len(entries)}件あります。ご確認ください。**"]
+        for dm_message_id, title, due_date in entries:
+            line = f"- [{discord.utils.escape_markdown(title)}]({DiscordUtil.jump_url(None, dm.id, dm_message_id)})"
+            if due_date is not None:
+                line += f"（期限: {due_date.strftime('%Y/%m/%d')}）"
+            lines.append(line)
+
+        # メッセージの文字数上限を超える場合は分割する
+        content = ""
+        for line in lines:
+            if content and len(content) + len(line) + 1 > DIGEST_MESSAGE_LIMIT:
+                await dm.send(content)
+                content = ""
+            content = f"{content}\n{line}" if content else line
+        await dm.send(content)
 
 
 def setup(bot):
@@ -55,6 +55,34 @@ class Settings(BaseSettings):
     # Panopticon
     PANOPTICON_API_URL: Optional[str] = None
     PANOPTICON_API_KEY: Optional[str] = None
+    # エンドポイントごとのレート制限（毎秒のリクエスト数・バースト数、0以下で無制限）
+    PANOPTICON_RATE_LIMIT_PER_SECOND: float = 5.0
+    PANOPTICON_RATE_LIMIT_BURST: int = 10
+    # エンドポイント名 -> 毎秒のリクエスト数 (例: {"link_bulk": 1.0})
+    PANOPTICON_RATE_LIMIT_OVERRIDES: dict[str, float] = {}
+    # get_usersの同時実行数・ユーザー情報のキャッシュ秒数
+    PANOPTICON_USERS_CONCURRENCY: int = 8
+    PANOPTICON_USER_CACHE_TTL: float = 60.0
+
+    # Retention
+    # 完了した稟議・通知済みの参加申請をアーカイブテーブルに移すまでの日数
+    RETENTION_STAFF_REQUEST_DAYS: int = 90
+    RETENTION_SITE_APPLICATION_DAYS: int = 30
+    # 1トランザクションで移動する件数
+    RETENTION_BATCH_SIZE: int = 500
+
+    # Job queue
+    # 1回に取得するジョブ数・取得したジョブのロック秒数
+    JOB_BATCH_SIZE: int = 10
+    JOB_LEASE_SECONDS: int = 300
+    # 1回限りのジョブを諦めるまでの実行回数
+    JOB_MAX_ATTEMPTS: int = 5
+    # 他のインスタンスが登録したジョブを確認する間隔(秒)
+    JOB_POLL_INTERVAL: float = 30.0
+
+    # Linker
+    # ギルドごとのニックネーム変更の間隔(秒)
+    LINKER_NICK_EDIT_INTERVAL: float = 1.0
 
     @classmethod
     @field_validator("SENTRY_DSN")
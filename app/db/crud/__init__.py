@@ -1 +1,3 @@
-__all__ = []
+from .guild import CRUDGuild, crud_guild
+
+__all__ = ["CRUDGuild", "crud_guild"]
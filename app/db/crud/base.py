@@ -1,6 +1,19 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from pydantic import BaseModel
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from db.models.base import BaseModel as DBBaseModel
@@ -85,7 +98,105 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         削除
         """
-        obj = db.query(self.model).get(id)
+        obj = db.get(self.model, id)
         db.delete(obj)
         db.commit()
         return obj
+
+    # ========== 一括操作 ==========
+    # 以下のメソッドはcommitしない（呼び出し元でまとめてcommitする）
+
+    @staticmethod
+    def _to_dict(obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+        if isinstance(obj_in, dict):
+            return obj_in
+        return obj_in.model_dump() if hasattr(obj_in, "model_dump") else obj_in.dict()
+
+    def get_many(self, db: Session, ids: Sequence[int]) -> List[ModelType]:
+        """
+        複数IDで取得（存在しないIDは含まれない）
+        """
+        if not ids:
+            return []
+        return list(db.scalars(select(self.model).where(self.model.id.in_(ids))))
+
+    def bulk_create(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+    ) -> List[ModelType]:
+        """
+        一括作成（1文のINSERT ... RETURNING）
+        """
+        if not objs_in:
+            return []
+        rows = [self._to_dict(obj_in) for obj_in in objs_in]
+        return list(db.scalars(insert(self.model).values(rows).returning(self.model)))
+
+    def bulk_upsert(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        index_elements: Sequence[str],
+        update_fields: Optional[Sequence[str]] = None,
+    ) -> List[ModelType]:
+        """
+        一括作成・更新（INSERT ... ON CONFLICT DO UPDATE ... RETURNING）
+        index_elements: 競合判定に使うunique制約のカラム
+        update_fields: 競合時に更新するカラム（省略時はindex_elements以外の入力カラム）
+        update_fieldsが空の場合はDO NOTHINGとなり、既存の行は返らない
+        """
+        if not objs_in:
+            return []
+        rows = [self._to_dict(obj_in) for obj_in in objs_in]
+
+        if update_fields is None:
+            update_fields = [key for key in rows[0] if key not in index_elements]
+
+        stmt = pg_insert(self.model).values(rows)
+        if update_fields:
+            set_ = {field: stmt.excluded[field] for field in update_fields}
+            if "updated_at" in self.model.__table__.columns:
+                set_["updated_at"] = func.now()
+            stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+        return list(
+            db.scalars(
+                stmt.returning(self.model),
+                execution_options={"populate_existing": True},
+            )
+        )
+
+    def delete_many(self, db: Session, ids: Sequence[int]) -> int:
+        """
+        複数IDで削除し、削除件数を返す
+        """
+        if not ids:
+            return 0
+        return db.execute(delete(self.model).where(self.model.id.in_(ids))).rowcount
+
+    def iter_all(
+        self, db: Session, *criteria: Any, batch_size: int = 500
+    ) -> Iterator[ModelType]:
+        """
+        全件をid順に走査する（OFFSETを使わないキーセットページング）
+        criteria: 追加の絞り込み条件
+        """
+        last_id = 0
+        while True:
+            batch = list(
+                db.scalars(
+                    select(self.model)
+                    .where(self.model.id > last_id, *criteria)
+                    .order_by(self.model.id)
+                    .limit(batch_size)
+                )
+            )
+            if not batch:
+                return
+            yield from batch
+            last_id = batch[-1].id
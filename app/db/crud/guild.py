@@ -0,0 +1,81 @@
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from db.models import Guild
+from db.schemas import GuildCreate
+
+from .base import CRUDBase
+
+
+class CRUDGuild(CRUDBase[Guild, GuildCreate, GuildCreate]):
+    """
+    ギルドのCRUD操作
+    DiscordのギルドID -> Guild.id の対応をプロセス全体でキャッシュする
+    （guildsの行は削除されないため、一度解決した対応は変わらない）
+    未登録のギルドはキャッシュせず、毎回DBを確認する（他のインスタンスが登録した場合に備える）
+    """
+
+    def __init__(self):
+        super().__init__(Guild)
+        # Discord guild_id -> Guild.id
+        self._id_cache: Dict[int, int] = {}
+
+    def warm(self, db: Session) -> None:
+        """
+        全ギルドの対応を読み込む（起動時、id順のキーセットページングで走査する）
+        """
+        self._id_cache.update((guild.guild_id, guild.id) for guild in self.iter_all(db))
+
+    def get_ids(self, db: Session, guild_ids: Sequence[int]) -> Dict[int, int]:
+        """
+        DiscordのギルドID -> Guild.id（未登録のギルドは含まれない）
+        """
+        missing = [guild_id for guild_id in guild_ids if guild_id not in self._id_cache]
+        if missing:
+            self._id_cache.update(
+                db.execute(
+                    select(Guild.guild_id, Guild.id).where(Guild.guild_id.in_(missing))
+                ).tuples()
+            )
+
+        return {
+            guild_id: self._id_cache[guild_id]
+            for guild_id in guild_ids
+            if guild_id in self._id_cache
+        }
+
+    def get_id(self, db: Session, guild_id: int) -> Optional[int]:
+        return self.get_ids(db, [guild_id]).get(guild_id)
+
+    def get_or_create_id(self, db: Session, guild_id: int) -> int:
+        """
+        Guild.idを取得し、未登録であれば作成する（commitしない）
+        """
+        guild_pk = self.get_id(db, guild_id)
+        if guild_pk is not None:
+            return guild_pk
+
+        guild_pk = db.scalar(
+            pg_insert(Guild)
+            .values(guild_id=guild_id)
+            .on_conflict_do_nothing(index_elements=["guild_id"])
+            .returning(Guild.id)
+        )
+        if guild_pk is None:
+            # 他の処理が先に作成していた場合
+            guild_pk = db.scalar(select(Guild.id).where(Guild.guild_id == guild_id))
+            self._id_cache[guild_id] = guild_pk
+            return guild_pk
+
+        # ロールバックされた行をキャッシュしないよう、commit後に反映する
+        def write_through(_session):
+            self._id_cache[guild_id] = guild_pk
+
+        event.listen(db, "after_commit", write_through, once=True)
+        return guild_pk
+
+
+crud_guild = CRUDGuild()
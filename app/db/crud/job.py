@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import Row, case, delete, event, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from db.models import Job
+from utils.job_queue import job_registry
+
+
+def schedule_job(
+    db: Session,
+    kind: str,
+    run_at: datetime,
+    payload: Optional[dict[str, Any]] = None,
+    dedupe_key: Optional[str] = None,
+    replace: bool = True,
+) -> None:
+    """
+    ジョブを登録する（commitは呼び出し元で行う）
+    dedupe_keyが既に存在する場合、replace=Trueなら実行予定時刻・payloadを更新し、
+    Falseなら何もしない
+    実行中のジョブのリースは外さない（同時に実行されないよう、実行が終わってから新しい時刻に実行される）
+    """
+    stmt = pg_insert(Job).values(
+        kind=kind, payload=payload or {}, run_at=run_at, dedupe_key=dedupe_key
+    )
+    if dedupe_key is not None:
+        if replace:
+            leased = Job.locked_until > func.now()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["dedupe_key"],
+                set_={
+                    "kind": stmt.excluded.kind,
+                    "payload": stmt.excluded.payload,
+                    "run_at": stmt.excluded.run_at,
+                    "attempts": case((leased, Job.attempts), else_=0),
+                    "last_error": case((leased, Job.last_error), else_=None),
+                    # 実行中のワーカーは、updated_atが変わっていれば登録し直されたと判断する
+                    "updated_at": func.clock_timestamp(),
+                },
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["dedupe_key"])
+    db.execute(stmt)
+    wake_worker_after_commit(db)
+
+
+def wake_worker_after_commit(db: Session) -> None:
+    # 同じプロセスのワーカーはcommit後すぐに実行予定時刻を計算し直す
+    event.listen(db, "after_commit", job_registry.wake, once=True)
+
+
+def cancel_job(db: Session, dedupe_key: str) -> None:
+    db.execute(delete(Job).where(Job.dedupe_key == dedupe_key))
+
+
+def claim_jobs(
+    db: Session, kinds: Sequence[str], limit: int, lease: timedelta
+) -> Sequence[Row]:
+    """
+    実行予定時刻を過ぎたジョブを最大limit件取得し、leaseの間ロックする（commitは呼び出し元で行う）
+    他のワーカーが取得中の行はSKIP LOCKEDで読み飛ばす
+    """
+    now = func.now()
+    claimable = (
+        select(Job.id)
+        .where(
+            Job.kind.in_(kinds),
+            Job.run_at <= now,
+            or_(Job.locked_until.is_(None), Job.locked_until < now),
+        )
+        .order_by(Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return db.execute(
+        update(Job)
+        .where(Job.id.in_(claimable.scalar_subquery()))
+        .values(locked_until=now + lease, attempts=Job.attempts + 1)
+        .returning(
+            Job.id,
+            Job.kind,
+            Job.payload,
+            Job.attempts,
+            Job.locked_until,
+            Job.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def _owned(job: Row):
+    # リースが切れて他のワーカーが取得し直した場合は何もしない
+    return (Job.id == job.id) & (Job.locked_until == job.locked_until)
+
+
+def _unchanged(job: Row):
+    # 実行中にschedule_jobで登録し直されていない
+    return Job.updated_at == job.updated_at
+
+
+def _release(db: Session, job: Row) -> None:
+    """
+    実行中に登録し直されたジョブは、登録し直された実行予定時刻のままリースだけ外す
+    """
+    db.execute(
+        update(Job)
+        .where(_owned(job))
+        .values(locked_until=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def complete_job(db: Session, job: Row) -> None:
+    db.execute(
+        delete(Job)
+        .where(_owned(job), _unchanged(job))
+        .execution_options(synchronize_session=False)
+    )
+    _release(db, job)
+
+
+def reschedule_job(
+    db: Session, job: Row, run_at: datetime, error: Optional[str] = None
+) -> None:
+    """
+    取得中のジョブを解放し、run_atに再実行する
+    error: 失敗による再実行の場合のエラー内容（成功した定期ジョブは実行回数を戻す）
+    """
+    values = {"run_at": run_at, "locked_until": None, "last_error": error}
+    if error is None:
+        values["attempts"] = 0
+    db.execute(
+        update(Job)
+        .where(_owned(job), _unchanged(job))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    _release(db, job)
+
+
+def next_run_at(db: Session, kinds: Sequence[str]) -> Optional[datetime]:
+    """
+    次に取得可能になる時刻（取得中のジョブはリース期限）
+    """
+    return db.scalar(
+        select(
+            func.min(
+                func.greatest(Job.run_at, func.coalesce(Job.locked_until, Job.run_at))
+            )
+        ).where(Job.kind.in_(kinds))
+    )
@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import Any, Collection, Type
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from db.models import (
+    Base,
+    SiteApplication,
+    SiteApplicationArchive,
+    StaffRequest,
+    StaffRequestArchive,
+    StaffRequestUser,
+    StaffRequestUserArchive,
+)
+
+
+def _move_rows(
+    db: Session, model: Type[Base], archive_model: Type[Base], where: Any
+) -> int:
+    """
+    条件に合う行を1文で削除し、そのままアーカイブテーブルに挿入する
+    WITH moved AS (DELETE ... RETURNING ...) INSERT INTO archive SELECT ... FROM moved
+    """
+    table = model.__table__
+    columns = [column.name for column in table.columns]
+    moved = delete(table).where(where).returning(*table.columns).cte("moved")
+    stmt = (
+        insert(archive_model.__table__)
+        .from_select(columns, select(*[moved.c[name] for name in columns]))
+        .add_cte(moved)
+    )
+    return db.execute(stmt).rowcount
+
+
+def archive_finished_staff_requests(
+    db: Session, *, updated_before: datetime, batch_size: int
+) -> int:
+    """
+    全ユーザーが対応済・期限切れ・取り消しになり、updated_before以降に更新のない稟議を
+    最大batch_size件アーカイブする
+    対象の行はFOR UPDATE SKIP LOCKEDでロックし、処理中の稟議は待たずに次回へ回す
+    commitは呼び出し元で行う
+    """
+    staff_request_ids = list(
+        db.scalars(
+            select(StaffRequest.id)
+            .where(
+                StaffRequest.updated_at < updated_before,
+                StaffRequest.pending_count == 0,
+                # 最近ステータスが変わったものは残す
+                ~StaffRequest.users.any(StaffRequestUser.updated_at >= updated_before),
+            )
+            .order_by(StaffRequest.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+    )
+    if not staff_request_ids:
+        return 0
+
+    _move_rows(
+        db,
+        StaffRequestUser,
+        StaffRequestUserArchive,
+        StaffRequestUser.staff_request_id.in_(staff_request_ids),
+    )
+    return _move_rows(
+        db,
+        StaffRequest,
+        StaffRequestArchive,
+        StaffRequest.id.in_(staff_request_ids),
+    )
+
+
+def archive_site_applications(
+    db: Session,
+    *,
+    site_unix_name: str,
+    created_before: datetime,
+    exclude_original_ids: Collection[int],
+    batch_size: int,
+) -> int:
+    """
+    通知済みの参加申請を最大batch_size件アーカイブする
+    exclude_original_ids: 未処理の申請（アーカイブすると再通知されてしまうため除外する）
+    commitは呼び出し元で行う
+    """
+    conditions = [
+        SiteApplication.site_unix_name == site_unix_name,
+        SiteApplication.created_at < created_before,
+    ]
+    if exclude_original_ids:
+        conditions.append(SiteApplication.original_id.not_in(exclude_original_ids))
+
+    batch = (
+        select(SiteApplication.id)
+        .where(*conditions)
+        .order_by(SiteApplication.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return _move_rows(
+        db,
+        SiteApplication,
+        SiteApplicationArchive,
+        SiteApplication.id.in_(batch.scalar_subquery()),
+    )
@@ -0,0 +1,296 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Sequence
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from db.models import (
+    Job,
+    StaffRequest,
+    StaffRequestDigestGuild,
+    StaffRequestStatus,
+    StaffRequestUser,
+)
+
+from .job import schedule_job, wake_worker_after_commit
+
+# 期限の判定に使うタイムゾーン
+JST = timezone(timedelta(hours=9), "JST")
+
+# jobsテーブルのジョブの種類
+DUE_DATE_JOB_KIND = "staff_request.due_date"
+REMIND_JOB_KIND = "staff_request.remind"
+DIGEST_JOB_KIND = "staff_request.remind_digest"
+
+# リマインドの間隔
+REMIND_INTERVAL = timedelta(days=2)
+# まとめ送信するギルドのリマインドを実行する時刻（JST、毎日この時刻に揃える）
+DIGEST_TIME = time(9, 0)
+# DIGEST_TIMEに実行されたリマインドを集める時間（この時間が過ぎてからまとめて送信する）
+DIGEST_WINDOW = timedelta(minutes=10)
+
+
+def change_user_status(
+    db: Session, user_ids: Sequence[int], new_status: StaffRequestStatus
+) -> int:
+    """
+    稟議ユーザーのステータスを変更し、稟議のステータス別人数を同じトランザクションで更新する
+    既にnew_statusのユーザーは変更しない（二重に数えない）
+    変更した人数を返す。commitは呼び出し元で行う
+    """
+    if not user_ids:
+        return 0
+
+    changed = 0
+    for old_status in StaffRequestStatus:
+        if old_status == new_status:
+            continue
+
+        # 元のステータスを条件にして更新し、実際に変わった行だけ数える
+        staff_request_ids = list(
+            db.scalars(
+                update(StaffRequestUser)
+                .where(
+                    StaffRequestUser.id.in_(user_ids),
+                    StaffRequestUser.status == old_status,
+                )
+                .values(status=new_status)
+                .returning(StaffRequestUser.staff_request_id)
+                .execution_options(synchronize_session=False)
+            )
+        )
+
+        per_request: dict[int, int] = {}
+        for staff_request_id in staff_request_ids:
+            per_request[staff_request_id] = per_request.get(staff_request_id, 0) + 1
+
+        old_column = StaffRequest.count_column_name(old_status)
+        new_column = StaffRequest.count_column_name(new_status)
+        for staff_request_id, count in per_request.items():
+            db.execute(
+                update(StaffRequest)
+                .where(StaffRequest.id == staff_request_id)
+                .values(
+                    {
+                        old_column: getattr(StaffRequest, old_column) - count,
+                        new_column: getattr(StaffRequest, new_column) + count,
+                    }
+                )
+                .execution_options(synchronize_session=False)
+            )
+        changed += len(staff_request_ids)
+
+    return changed
+
+
+@dataclass
+class StatusTransition:
+    """DMのボタン操作によるステータス変更の結果"""
+
+    staff_request_id: int
+    # Falseの場合は既に変更後のステータスだった（連打・同時操作）
+    changed: bool
+    # 変更後の稟議の情報（changed=Falseの場合はNone）
+    summary_message_guild_id: Optional[int] = None
+    summary_message_channel_id: Optional[int] = None
+    summary_message_id: Optional[int] = None
+    created_by_id: Optional[int] = None
+    counts: dict[StaffRequestStatus, int] = field(default_factory=dict)
+
+
+def transition_by_dm_message(
+    db: Session,
+    dm_message_id: int,
+    from_status: StaffRequestStatus,
+    to_status: StaffRequestStatus,
+) -> Optional[StatusTransition]:
+    """
+    DMメッセージに対応する稟議ユーザーのステータスをfrom_status -> to_statusに変更し、
+    稟議の人数も含めて1文（UPDATE ... RETURNINGのCTE）で更新する
+    エントリが存在しない場合はNoneを返す。commitは呼び出し元で行う
+    """
+    from_column = StaffRequest.count_column_name(from_status)
+    to_column = StaffRequest.count_column_name(to_status)
+    count_columns = [
+        getattr(StaffRequest, StaffRequest.count_column_name(status))
+        for status in StaffRequestStatus
+    ]
+
+    changed = (
+        update(StaffRequestUser)
+        .where(
+            StaffRequestUser.dm_message_id == dm_message_id,
+            StaffRequestUser.status == from_status,
+        )
+        .values(status=to_status)
+        .returning(StaffRequestUser.staff_request_id)
+        .cte("changed")
+    )
+    row = db.execute(
+        update(StaffRequest)
+        .where(StaffRequest.id == changed.c.staff_request_id)
+        .values(
+            {
+                from_column: getattr(StaffRequest, from_column) - 1,
+                to_column: getattr(StaffRequest, to_column) + 1,
+            }
+        )
+        .returning(
+            StaffRequest.id,
+            StaffRequest.summary_message_guild_id,
+            StaffRequest.summary_message_channel_id,
+            StaffRequest.summary_message_id,
+            StaffRequest.created_by_id,
+            *count_columns,
+        )
+        .add_cte(changed)
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+
+    if row is not None:
+        return StatusTransition(
+            staff_request_id=row[0],
+            changed=True,
+            summary_message_guild_id=row[1],
+            summary_message_channel_id=row[2],
+            summary_message_id=row[3],
+            created_by_id=row[4],
+            counts=dict(zip(StaffRequestStatus, row[5:])),
+        )
+
+    # 変更されなかった場合のみ、エントリの有無を確認する
+    staff_request_id = db.scalar(
+        select(StaffRequestUser.staff_request_id).where(
+            StaffRequestUser.dm_message_id == dm_message_id
+        )
+    )
+    if staff_request_id is None:
+        return None
+    return StatusTransition(staff_request_id=staff_request_id, changed=False)
+
+
+def schedule_due_date_notice(
+    db: Session, staff_request_id: int, due_date: date, replace: bool = True
+) -> None:
+    """
+    期限超過の通知ジョブを期限日の翌日0時（JST）に登録する（commitは呼び出し元で行う）
+    """
+    schedule_job(
+        db,
+        DUE_DATE_JOB_KIND,
+        run_at=datetime.combine(due_date + timedelta(days=1), time(), tzinfo=JST),
+        payload={"staff_request_id": staff_request_id},
+        dedupe_key=f"{DUE_DATE_JOB_KIND}:{staff_request_id}",
+        replace=replace,
+    )
+
+
+def schedule_remind(
+    db: Session, staff_request_id: int, run_at: datetime, replace: bool = True
+) -> None:
+    """
+    稟議のリマインドジョブを登録する
+    replace=Trueなら登録済みのジョブの実行予定時刻を更新し、Falseなら登録済みのジョブを残す
+    """
+    schedule_job(
+        db,
+        REMIND_JOB_KIND,
+        run_at=run_at,
+        payload={"staff_request_id": staff_request_id},
+        dedupe_key=f"{REMIND_JOB_KIND}:{staff_request_id}",
+        replace=replace,
+    )
+
+
+def is_digest_guild(db: Session, guild_id: int) -> bool:
+    return (
+        db.scalar(
+            select(StaffRequestDigestGuild.id).where(
+                StaffRequestDigestGuild.guild_id == guild_id
+            )
+        )
+        is not None
+    )
+
+
+def remind_run_at(due: datetime, digest: bool) -> datetime:
+    """
+    リマインドの実行予定時刻
+    まとめ送信するギルドでは、ユーザーの稟議のリマインドが1通にまとまるよう、
+    due以降の最初のDIGEST_TIMEに揃える（DIGEST_TIMEからDIGEST_WINDOW以内であればそのDIGEST_TIME）
+    """
+    if not digest:
+        return due
+    local = due.astimezone(JST)
+    run_at = datetime.combine(local.date(), DIGEST_TIME, tzinfo=JST)
+    if run_at < local - DIGEST_WINDOW:
+        run_at += timedelta(days=1)
+    return run_at
+
+
+def rearm_staff_request_jobs(db: Session, staff_request_id: int) -> None:
+    """
+    未対応者が0人から戻った稟議のリマインド・期限超過の通知ジョブを登録し直す
+    （どちらのジョブも未対応者が居なくなった時点で終了しているため）
+    登録済みのジョブは残す。commitは呼び出し元で行う
+    """
+    row = db.execute(
+        select(
+            StaffRequest.summary_message_guild_id,
+            StaffRequest.due_date,
+            StaffRequest.is_due_date_notified,
+        ).where(StaffRequest.id == staff_request_id)
+    ).one_or_none()
+    if row is None:
+        return
+    guild_id, due_date, is_due_date_notified = row
+
+    schedule_remind(
+        db,
+        staff_request_id,
+        remind_run_at(
+            datetime.now(timezone.utc) + REMIND_INTERVAL,
+            is_digest_guild(db, guild_id),
+        ),
+        replace=False,
+    )
+    if due_date is not None and not is_due_date_notified:
+        schedule_due_date_notice(db, staff_request_id, due_date, replace=False)
+
+
+def digest_job_key(user_id: int, digest_at: datetime) -> str:
+    return f"{DIGEST_JOB_KIND}:{user_id}:{digest_at.astimezone(JST).date().isoformat()}"
+
+
+def add_to_digest(
+    db: Session, user_id: int, staff_request_id: int, now: datetime
+) -> None:
+    """
+    ユーザーへのまとめ送信ジョブに稟議を追加する
+    ジョブはユーザーごと・DIGEST_TIMEごとに1つで、DIGEST_TIMEからDIGEST_WINDOW後に実行される
+    （同じDIGEST_TIMEに実行されたリマインドはpayloadのstaff_request_idsに集まる）
+    """
+    digest_at = remind_run_at(now, digest=True)
+    stmt = pg_insert(Job).values(
+        kind=DIGEST_JOB_KIND,
+        payload={"user_id": user_id, "staff_request_ids": [staff_request_id]},
+        run_at=digest_at + DIGEST_WINDOW,
+        dedupe_key=digest_job_key(user_id, digest_at),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["dedupe_key"],
+        set_={
+            "payload": Job.payload.op("||")(
+                func.jsonb_build_object(
+                    "staff_request_ids",
+                    Job.payload.op("->")("staff_request_ids").op("||")(
+                        stmt.excluded.payload.op("->")("staff_request_ids")
+                    ),
+                )
+            )
+        },
+    )
+    db.execute(stmt)
+    wake_worker_after_commit(db)
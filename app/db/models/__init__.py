@@ -2,12 +2,17 @@ from .base import Base, BaseModel, TimeStampMixin
 from .linker import Guild, NickUpdateTargetGuild, RegisteredRole
 from .member_management import (
     SiteApplication,
+    SiteApplicationArchive,
     SiteApplicationNotifyChannel,
 )
+from .job import Job
 from .privilege_management import PrivilegeRemoveQueue
 from .staff_request import (
     StaffRequest,
+    StaffRequestArchive,
+    StaffRequestDigestGuild,
     StaffRequestUser,
+    StaffRequestUserArchive,
     StaffRequestStatus,
 )
 from .role_group import (
@@ -26,13 +31,19 @@ __all__ = [
     "RegisteredRole",
     # member_management
     "SiteApplication",
+    "SiteApplicationArchive",
     "SiteApplicationNotifyChannel",
+    # job
+    "Job",
     # privilege_management
     "PrivilegeRemoveQueue",
     # staff_request
     "StaffRequest",
     "StaffRequestUser",
     "StaffRequestStatus",
+    "StaffRequestArchive",
+    "StaffRequestUserArchive",
+    "StaffRequestDigestGuild",
     # role_group
     "RoleGroup",
     "RoleGroupRole",
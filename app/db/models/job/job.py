@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..base import BaseModel
+
+
+class Job(BaseModel):
+    """
+    時刻指定で実行する処理のキュー
+    ワーカー（cogs/job_worker.py）がFOR UPDATE SKIP LOCKEDで取得し、
+    locked_untilまでの間は他のワーカーに取得されない
+    """
+
+    __tablename__ = "jobs"
+
+    # 処理の種類（utils.job_queueに登録したハンドラのキー）
+    kind: Mapped[str] = mapped_column(String(100), nullable=False)
+    payload: Mapped[dict] = mapped_column(
+        JSONB, nullable=False, default=dict, server_default="{}"
+    )
+
+    # 実行予定時刻
+    run_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+    # 実行回数・取得中のワーカーのリース期限・最後のエラー
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    locked_until: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # 同じ処理を重複して登録しないためのキー（登録し直すと実行予定時刻が更新される）
+    dedupe_key: Mapped[Optional[str]] = mapped_column(
+        String(200), nullable=True, unique=True
+    )
@@ -16,7 +16,9 @@ class RegisteredRole(BaseModel):
 
     role_id: Mapped[int] = mapped_column(BigInteger, unique=True)
 
-    guild_id: Mapped[int] = mapped_column(ForeignKey("guilds.id"), nullable=False)
+    guild_id: Mapped[int] = mapped_column(
+        ForeignKey("guilds.id"), nullable=False, index=True
+    )
 
     # Noneなら両方、Trueならリンク済み、Falseなら未リンク
     is_linked: Mapped[Opt[bool]] = mapped_column(Boolean, nullable=True)
@@ -1,7 +1,9 @@
 from .site_application import SiteApplication
+from .site_application_archive import SiteApplicationArchive
 from .site_application_notify_channel import SiteApplicationNotifyChannel
 
 __all__ = [
     "SiteApplication",
+    "SiteApplicationArchive",
     "SiteApplicationNotifyChannel",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String
+from sqlalchemy import Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..base import BaseModel
@@ -9,3 +9,12 @@ class SiteApplication(BaseModel):
 
     original_id: Mapped[int] = mapped_column(Integer)
     site_unix_name: Mapped[str] = mapped_column(String(100))
+
+    # 同じ申請を二重に通知しない
+    __table_args__ = (
+        UniqueConstraint(
+            "original_id",
+            "site_unix_name",
+            name="uq_site_applications_original_id_site_unix_name",
+        ),
+    )
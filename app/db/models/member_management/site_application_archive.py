@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import text
+
+from ..base import Base
+
+
+class SiteApplicationArchive(Base):
+    """
+    通知済みの参加申請のアーカイブ
+    site_applicationsと同じカラム（idはそのまま引き継ぐ）にarchived_atを加えたもの
+    """
+
+    __tablename__ = "site_applications_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    original_id: Mapped[int] = mapped_column(Integer)
+    site_unix_name: Mapped[str] = mapped_column(String(100))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=text("now()")
+    )
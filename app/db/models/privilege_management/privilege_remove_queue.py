@@ -26,5 +26,5 @@ class PrivilegeRemoveQueue(BaseModel):
 
     # expired_at
     expired_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False
+        DateTime(timezone=True), nullable=False, index=True
     )
@@ -17,7 +17,7 @@ class RoleGroupRole(BaseModel):
     role_group_id: Mapped[int] = mapped_column(
         ForeignKey("role_groups.id"), nullable=False
     )
-    guild_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    guild_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
     role_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
 
     # Relationships
@@ -1,8 +1,13 @@
 from .staff_request import StaffRequest
 from .staff_request_user import StaffRequestUser, StaffRequestStatus
+from .staff_request_archive import StaffRequestArchive, StaffRequestUserArchive
+from .staff_request_digest_guild import StaffRequestDigestGuild
 
 __all__ = [
     "StaffRequest",
     "StaffRequestUser",
     "StaffRequestStatus",
+    "StaffRequestArchive",
+    "StaffRequestUserArchive",
+    "StaffRequestDigestGuild",
 ]
@@ -1,7 +1,17 @@
 from datetime import date, datetime
 from typing import List
 
-from sqlalchemy import BigInteger, String, UniqueConstraint, Date, DateTime, Boolean
+from sqlalchemy import (
+    BigInteger,
+    String,
+    UniqueConstraint,
+    Date,
+    DateTime,
+    Boolean,
+    Index,
+    Integer,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..base import BaseModel
@@ -37,12 +47,46 @@ class StaffRequest(BaseModel):
 
     last_remind_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
 
+    # ステータスごとの人数
+    # StaffRequestUserのステータスと同じトランザクションで更新する（db.crud.staff_request）
+    pending_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    done_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    expired_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    canceled_by_requester_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+
     # 制約
     __table_args__ = (
         UniqueConstraint("summary_message_guild_id", "summary_message_id"),
+        # 期限超過の未通知チェック用
+        Index(
+            "ix_staff_requests_due_date_unnotified",
+            "due_date",
+            postgresql_where=text("is_due_date_notified = false"),
+        ),
+        # 未対応ユーザーが残っている稟議の取得用
+        Index(
+            "ix_staff_requests_due_date_has_pending",
+            "due_date",
+            postgresql_where=text("pending_count > 0"),
+        ),
     )
 
     # 関数群
+    @staticmethod
+    def count_column_name(status: "StaffRequestStatus") -> str:
+        return f"{status.name.lower()}_count"
+
+    def count_for(self, status: "StaffRequestStatus") -> int:
+        return getattr(self, self.count_column_name(status)) or 0
+
     def _get_users_by_status(
         self, status: "StaffRequestStatus"
     ) -> List["StaffRequestUser"]:
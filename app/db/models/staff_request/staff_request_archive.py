@@ -0,0 +1,65 @@
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Enum, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import text
+
+from ..base import Base
+from .staff_request_user import StaffRequestStatus
+
+
+class StaffRequestArchive(Base):
+    """
+    完了した稟議のアーカイブ
+    staff_requestsと同じカラム（idはそのまま引き継ぐ）にarchived_atを加えたもの
+    """
+
+    __tablename__ = "staff_requests_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    summary_message_guild_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    summary_message_channel_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    summary_message_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    created_by_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    title: Mapped[str] = mapped_column(String, nullable=False)
+    description: Mapped[str] = mapped_column(String, nullable=True)
+    url: Mapped[str] = mapped_column(String, nullable=True)
+    due_date: Mapped[date] = mapped_column(Date, nullable=True)
+    is_due_date_notified: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    last_remind_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    pending_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default="0"
+    )
+    done_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    expired_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default="0"
+    )
+    canceled_by_requester_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default="0"
+    )
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=text("now()")
+    )
+
+
+class StaffRequestUserArchive(Base):
+    """
+    完了した稟議の対象ユーザーのアーカイブ
+    """
+
+    __tablename__ = "staff_request_users_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    staff_request_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    dm_message_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    status: Mapped[StaffRequestStatus] = mapped_column(
+        Enum(StaffRequestStatus), nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=text("now()")
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..base import BaseModel
+
+
+class StaffRequestDigestGuild(BaseModel):
+    """
+    リマインドをまとめて送るギルド
+    登録されたギルドの稟議は、ユーザーごとに1通のDMにまとめてリマインドする
+    """
+
+    __tablename__ = "staff_request_digest_guilds"
+
+    guild_id: Mapped[int] = mapped_column(BigInteger, unique=True)
@@ -1,7 +1,7 @@
 import enum as python_enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import BigInteger, Enum, ForeignKey
+from sqlalchemy import BigInteger, Enum, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..base import BaseModel
@@ -43,13 +43,22 @@ class StaffRequestUser(BaseModel):
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
 
     # 通知メッセージID(DM)
-    dm_message_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    dm_message_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
 
     # ステータス
     status: Mapped[StaffRequestStatus] = mapped_column(
         Enum(StaffRequestStatus), nullable=False
     )
 
+    # 制約
+    __table_args__ = (
+        Index(
+            "ix_staff_request_users_staff_request_id_status",
+            "staff_request_id",
+            "status",
+        ),
+    )
+
     @property
     def status_name_ja(self) -> str:
         return StaffRequestStatus.name_ja(self.status)
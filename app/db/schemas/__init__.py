@@ -1,7 +1,9 @@
 from .base import BaseSchema, TimestampSchema, BaseModelSchema
+from .guild import GuildCreate
 
 __all__ = [
     "BaseSchema",
     "TimestampSchema",
     "BaseModelSchema",
+    "GuildCreate",
 ]
@@ -0,0 +1,9 @@
+from .base import BaseSchema
+
+
+class GuildCreate(BaseSchema):
+    """
+    ギルド作成用スキーマ
+    """
+
+    guild_id: int
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# アプリのモジュールは app/ からの相対importで読み込まれる
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
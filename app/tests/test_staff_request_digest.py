@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+from db.crud.staff_request import (
+    DIGEST_TIME,
+    DIGEST_WINDOW,
+    JST,
+    REMIND_INTERVAL,
+    digest_job_key,
+    remind_run_at,
+)
+
+
+def created(hour: int, minute: int = 0) -> datetime:
+    return datetime(2026, 10, 19, hour, minute, tzinfo=JST)
+
+
+def test_requests_created_at_different_times_share_one_digest():
+    # 同じユーザーに、同じ日の異なる時刻に作成された稟議が8件ある
+    user_id = 1234
+    created_ats = [created(9, 30), created(10), created(11, 15), created(13)]
+    created_ats += [created(15, 45), created(18), created(21, 30), created(23, 59)]
+
+    run_ats = {remind_run_at(c + REMIND_INTERVAL, digest=True) for c in created_ats}
+    assert run_ats == {datetime(2026, 10, 22, 9, 0, tzinfo=JST)}
+
+    # 各リマインドは少しずつ遅れて実行されても、同じまとめ送信ジョブ（=1通のDM）に入る
+    run_at = run_ats.pop()
+    keys = {
+        digest_job_key(user_id, remind_run_at(run_at + timedelta(seconds=i * 30), True))
+        for i in range(len(created_ats))
+    }
+    assert len(keys) == 1
+
+
+def test_digest_remind_stays_on_digest_time_after_late_run():
+    # DIGEST_WINDOW以内の遅れは次回の実行時刻をずらさない
+    ran_at = datetime(2026, 10, 22, 9, 0, tzinfo=JST) + DIGEST_WINDOW
+    next_run_at = remind_run_at(ran_at + REMIND_INTERVAL, digest=True)
+    assert next_run_at == datetime(2026, 10, 24, 9, 0, tzinfo=JST)
+    assert next_run_at.time() == DIGEST_TIME
+
+
+def test_non_digest_remind_is_not_aligned():
+    due = datetime(2026, 10, 21, 4, 15, tzinfo=timezone.utc)
+    assert remind_run_at(due, digest=False) == due
@@ -6,9 +6,17 @@ from httpx import HTTPStatusError
 
 from core import get_settings
 from db import db_session
+from db.crud.job import cancel_job, schedule_job
 from db.models import PrivilegeRemoveQueue
 from utils.panopticon_client import PanopticonClient, Site
 
+# 権限剥奪ジョブの種類
+REVOKE_JOB_KIND = "privilege.revoke"
+
+
+def revoke_job_key(queue_id: int) -> str:
+    return f"{REVOKE_JOB_KIND}:{queue_id}"
+
 
 def _get_panopticon_client() -> Optional[PanopticonClient]:
     settings = get_settings()
@@ -173,20 +181,29 @@ class GetPrivilegeSiteSelector(discord.ui.View):
             with db_session() as session:
                 # 権限剥奪キューに追加
                 # expired_atは1時間後
-                notify_msg = await interaction.channel.fetch_message(
-                    notify_msg_partial.id
-                )
+                # 送信したメッセージのIDはfollowupの戻り値から取得する（再取得しない）
                 privilege_remove_queue = PrivilegeRemoveQueue(
                     dc_user_id=interaction.user.id,
                     wd_user_id=wikidot_user_id,
                     wd_site_unix_name=selected_site_unix_name,
-                    notify_guild_id=notify_msg.guild.id,
-                    notify_channel_id=notify_msg.channel.id,
-                    notify_message_id=notify_msg.id,
+                    notify_guild_id=interaction.guild_id,
+                    notify_channel_id=interaction.channel_id,
+                    notify_message_id=notify_msg_partial.id,
                     permission_level=permission_level,
-                    expired_at=datetime.datetime.now() + datetime.timedelta(hours=1),
+                    expired_at=datetime.datetime.now(datetime.timezone.utc)
+                    + datetime.timedelta(hours=1),
                 )
                 session.add(privilege_remove_queue)
+                session.flush()
+
+                # expired_atに権限剥奪ジョブを実行する
+                schedule_job(
+                    session,
+                    REVOKE_JOB_KIND,
+                    run_at=privilege_remove_queue.expired_at,
+                    payload={"queue_id": privilege_remove_queue.id},
+                    dedupe_key=revoke_job_key(privilege_remove_queue.id),
+                )
                 session.commit()
         finally:
             # selector削除
@@ -247,6 +264,7 @@ class PrivilegeRemoveButton(discord.ui.View):
                 return
 
             # キューから削除
+            cancel_job(session, revoke_job_key(queue.id))
             session.delete(queue)
             session.commit()
 
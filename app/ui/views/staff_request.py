@@ -1,29 +1,50 @@
-from datetime import datetime
+import logging
+from datetime import datetime, timezone
+from typing import Optional
 
 import discord
 
 from db.connection import db_session
+from db.crud.staff_request import (
+    REMIND_INTERVAL,
+    StatusTransition,
+    change_user_status,
+    is_digest_guild,
+    rearm_staff_request_jobs,
+    remind_run_at,
+    schedule_due_date_notice,
+    schedule_remind,
+    transition_by_dm_message,
+)
 from db.models.staff_request import (
     StaffRequest,
     StaffRequestUser,
     StaffRequestStatus,
 )
+from utils.debouncer import KeyedDebouncer
+from utils.discord import DiscordUtil
+from utils.role_member_index import role_member_index
 from utils.temporary_memory import TemporaryMemory
 
 # インメモリキャッシュのインスタンス
 temp_memory = TemporaryMemory()
 
+# サマリメッセージの再描画（サマリメッセージID単位でまとめる）
+summary_renderer = KeyedDebouncer(delay=2.0, name="StaffRequestSummary")
+
 
 class CommonFunctions:
     @staticmethod
     def create_summary_embed(
         staff_request: StaffRequest,
-        guild: discord.Guild,
+        guild: Optional[discord.Guild],
         title: str = "スタッフへの確認依頼",
         color: discord.Color = discord.Color.teal(),
     ):
         # created_by_idからユーザ取得
-        created_by = guild.get_member(staff_request.created_by_id)
+        created_by = (
+            guild.get_member(staff_request.created_by_id) if guild is not None else None
+        )
 
         # Embed作成
         embed = (
@@ -51,28 +72,120 @@ class CommonFunctions:
             )
 
         # ステータスを順に追加
+        # 人数はカウンタから取得し、該当者がいるステータスのみユーザーを読み込む
         for status in StaffRequestStatus:
+            if staff_request.count_for(status) == 0:
+                continue
             users = getattr(staff_request, f"{status.name.lower()}_users")
             if not users:
                 continue
 
-            discord_users = []
-            for user in users:
-                discord_user = guild.get_member(user.user_id)
-                if discord_user:
-                    discord_users.append(discord_user)
-                    continue
-
+            # メンションはIDから組み立てる（メンバーの取得は不要）
             embed.add_field(
                 name=f"ステータス: {StaffRequestStatus.name_ja(status)} -> {len(users)}名",
-                value=" ".join([_du.mention for _du in discord_users])
-                if len(users) > 0
-                else "なし",
+                value=" ".join([f"<@{user.user_id}>" for user in users]),
                 inline=False,
             )
 
         return embed
 
+    @staticmethod
+    def create_dm_embed(
+        staff_request: StaffRequest,
+        color: discord.Color = discord.Color.orange(),
+        footer: Optional[str] = None,
+    ):
+        """
+        依頼対象者へのDMのEmbed（保存済みの情報から組み立てるため、編集時に取得は不要）
+        """
+        embed = (
+            discord.Embed(
+                title="確認依頼",
+                description=f"<@{staff_request.created_by_id}> さんから確認依頼が届いています。",
+                color=color,
+                url=DiscordUtil.jump_url(
+                    staff_request.summary_message_guild_id,
+                    staff_request.summary_message_channel_id,
+                    staff_request.summary_message_id,
+                ),
+            )
+            .add_field(name="タイトル", value=staff_request.title, inline=False)
+            .add_field(name="説明", value=staff_request.description, inline=False)
+            .add_field(name="URL", value=staff_request.url, inline=False)
+            .add_field(
+                name="期限",
+                value=staff_request.due_date.strftime("%Y/%m/%d")
+                if staff_request.due_date
+                else "未設定",
+                inline=False,
+            )
+        )
+        if footer is not None:
+            embed.set_footer(text=footer)
+        return embed
+
+    @staticmethod
+    def get_summary_message(
+        client: discord.Client, transition: StatusTransition
+    ) -> discord.PartialMessage:
+        return DiscordUtil.get_partial_message(
+            client,
+            transition.summary_message_channel_id,
+            transition.summary_message_id,
+            guild_id=transition.summary_message_guild_id,
+        )
+
+    @staticmethod
+    def schedule_summary_update(client: discord.Client, transition: StatusTransition):
+        """
+        ステータス変更後のサマリメッセージの再描画を予約する
+        短時間の変更はまとめ、最後に最新の状態で1回だけ編集する
+        """
+
+        async def render():
+            with db_session() as db:
+                staff_request = db.get(StaffRequest, transition.staff_request_id)
+                if staff_request is None:
+                    return
+                embed = CommonFunctions.create_summary_embed(
+                    staff_request, client.get_guild(transition.summary_message_guild_id)
+                )
+
+            # 取得せずに編集する（REST呼び出しは編集の1回のみ）
+            await CommonFunctions.get_summary_message(client, transition).edit(
+                embed=embed, view=RequestSummaryController()
+            )
+
+        summary_renderer.schedule(transition.summary_message_id, render)
+
+    @staticmethod
+    async def close_dm_messages(
+        client: discord.Client,
+        staff_request: StaffRequest,
+        color: discord.Color,
+        footer: str,
+    ) -> list[int]:
+        """
+        未対応ユーザーのDMからボタンを外し、未対応だったStaffRequestUser.idを返す
+        DMの編集はベストエフォート（削除・DM拒否などで失敗してもステータスは変更する）
+        """
+        embed = CommonFunctions.create_dm_embed(staff_request, color, footer)
+
+        closed_user_ids = []
+        for user in staff_request.pending_users:
+            closed_user_ids.append(user.id)
+            try:
+                dm_message = await DiscordUtil.get_dm_partial_message(
+                    client, user.user_id, user.dm_message_id
+                )
+                await dm_message.edit(embed=embed, view=None)
+            except discord.HTTPException as e:
+                logging.getLogger("discord").warning(
+                    f"[StaffRequest] failed to close DM {user.dm_message_id}: {e}"
+                )
+
+        return closed_user_ids
+
 
 class Flow1TargetSelector(discord.ui.View):
     def __init__(self):
@@ -115,7 +228,10 @@ class Flow1TargetSelector(discord.ui.View):
             # roleから取得
             target = message.guild.get_role(int(target_id))
             if target:
-                for m in target.members:
+                for member_id in role_member_index.member_ids(message.guild, target.id):
+                    m = message.guild.get_member(member_id)
+                    if m is None:
+                        continue
                     if m.id in target_ids:
                         continue
                     if m.bot:
@@ -229,26 +345,7 @@ class Flow2ConfirmView(discord.ui.View):
 
                 # DM送信
                 dm = await target.create_dm()
-                dm_message_embed = (
-                    discord.Embed(
-                        title="確認依頼",
-                        description=f"{interaction.user.mention} さんから確認依頼が届いています。",
-                        color=discord.Color.orange(),
-                        url=summary_msg.jump_url,
-                    )
-                    .add_field(name="タイトル", value=staff_request.title, inline=False)
-                    .add_field(
-                        name="説明", value=staff_request.description, inline=False
-                    )
-                    .add_field(name="URL", value=staff_request.url, inline=False)
-                    .add_field(
-                        name="期限",
-                        value=staff_request.due_date.strftime("%Y/%m/%d")
-                        if staff_request.due_date
-                        else "未設定",
-                        inline=False,
-                    )
-                )
+                dm_message_embed = CommonFunctions.create_dm_embed(staff_request)
 
                 dm_message = await dm.send(
                     embed=dm_message_embed, view=RequestDMController()
@@ -264,6 +361,20 @@ class Flow2ConfirmView(discord.ui.View):
 
                 sent_user_ids.append(target.id)
 
+            staff_request.pending_count = len(sent_user_ids)
+
+            # ---- 期限超過の通知・リマインドを予約 ----
+            if staff_request.due_date is not None:
+                schedule_due_date_notice(db, staff_request.id, staff_request.due_date)
+            schedule_remind(
+                db,
+                staff_request.id,
+                remind_run_at(
+                    datetime.now(timezone.utc) + REMIND_INTERVAL,
+                    is_digest_guild(db, staff_request.summary_message_guild_id),
+                ),
+            )
+
         db.commit()
 
         # ---- 元メッセージの削除 ----
@@ -284,66 +395,41 @@ class RequestDMController(discord.ui.View):
     ):
         await interaction.response.defer()
 
+        # ステータスの変更（人数の更新も含めて1文で行う）
         with db_session() as db:
-            # 稟議ユーザの取得
-            staff_request_user = (
-                db.query(StaffRequestUser)
-                .filter(StaffRequestUser.dm_message_id == interaction.message.id)
-                .one_or_none()
-            )
-
-            # 稟議ユーザが存在しない場合はエラー
-            if staff_request_user is None:
-                await interaction.followup.send(
-                    "DBエントリが見つかりませんでした。", ephemeral=True
-                )
-                return
-
-            # ステータスの変更
-            staff_request_user.status = StaffRequestStatus.DONE
-            db.commit()
-            db.refresh(staff_request_user)
-
-            # DMメッセージを更新
-            dm_embed = interaction.message.embeds[0]
-            dm_embed.colour = discord.Color.green()
-            dm_embed.set_footer(text="対応済")
-
-            await interaction.message.edit(
-                embed=dm_embed, view=RequestDMControllerIsDone()
+            transition = transition_by_dm_message(
+                db,
+                interaction.message.id,
+                StaffRequestStatus.PENDING,
+                StaffRequestStatus.DONE,
             )
 
-            # 元メッセージを更新
-            summary_guild_id = staff_request_user.staff_request.summary_message_guild_id
-            summary_channel_id = (
-                staff_request_user.staff_request.summary_message_channel_id
+        # 稟議ユーザが存在しない場合はエラー
+        if transition is None:
+            await interaction.followup.send(
+                "DBエントリが見つかりませんでした。", ephemeral=True
             )
-            summary_message_id = staff_request_user.staff_request.summary_message_id
+            return
 
-            summary_guild = interaction.client.get_guild(summary_guild_id)
+        # DMメッセージを更新
+        dm_embed = interaction.message.embeds[0]
+        dm_embed.colour = discord.Color.green()
+        dm_embed.set_footer(text="対応済")
 
-            if summary_guild is None:
-                summary_guild = await interaction.client.fetch_guild(summary_guild_id)
+        await interaction.message.edit(embed=dm_embed, view=RequestDMControllerIsDone())
 
-            summary_channel = summary_guild.get_channel(summary_channel_id)
+        # 既に対応済だった場合（連打・同時操作）は元メッセージを更新しない
+        if not transition.changed:
+            return
 
-            if summary_channel is None:
-                summary_channel = await summary_guild.fetch_channel(summary_channel_id)
+        # 元メッセージの更新を予約
+        CommonFunctions.schedule_summary_update(interaction.client, transition)
 
-            summary_message = await summary_channel.fetch_message(summary_message_id)
-
-            await summary_message.edit(
-                embed=CommonFunctions.create_summary_embed(
-                    staff_request_user.staff_request, summary_guild
-                ),
-                view=RequestSummaryController(),
-            )
-
-            # pendingが居なくなった場合、通知する
-            if len(staff_request_user.staff_request.pending_users) == 0:
-                await summary_message.reply(
-                    f"<@{staff_request_user.staff_request.created_by_id}> 全ての依頼者の対応が完了しました"
-                )
+        # pendingが居なくなった場合、通知する
+        if transition.counts[StaffRequestStatus.PENDING] == 0:
+            await CommonFunctions.get_summary_message(
+                interaction.client, transition
+            ).reply(f"<@{transition.created_by_id}> 全ての依頼者の対応が完了しました")
 
 
 class RequestDMControllerIsDone(discord.ui.View):
@@ -360,58 +446,43 @@ class RequestDMControllerIsDone(discord.ui.View):
     ):
         await interaction.response.defer()
 
+        # ステータスの変更（人数の更新も含めて1文で行う）
         with db_session() as db:
-            # 稟議ユーザの取得
-            staff_request_user = (
-                db.query(StaffRequestUser)
-                .filter(StaffRequestUser.dm_message_id == interaction.message.id)
-                .one_or_none()
+            transition = transition_by_dm_message(
+                db,
+                interaction.message.id,
+                StaffRequestStatus.DONE,
+                StaffRequestStatus.PENDING,
             )
 
-            # 稟議ユーザが存在しない場合はエラー
-            if staff_request_user is None:
-                await interaction.followup.send(
-                    "DBエントリが見つかりませんでした。", ephemeral=True
-                )
-                return
-
-            # ステータスの変更
-            staff_request_user.status = StaffRequestStatus.PENDING
-            db.commit()
-            db.refresh(staff_request_user)
-
-            # DMメッセージを更新
-            dm_embed = interaction.message.embeds[0]
-            dm_embed.colour = discord.Color.orange()
-            dm_embed.set_footer(text="未対応")
+            # 未対応者が0人から戻った場合、終了したリマインド・期限超過の通知を登録し直す
+            if (
+                transition is not None
+                and transition.changed
+                and transition.counts[StaffRequestStatus.PENDING] == 1
+            ):
+                rearm_staff_request_jobs(db, transition.staff_request_id)
 
-            await interaction.message.edit(embed=dm_embed, view=RequestDMController())
-
-            # 元メッセージを更新
-            summary_guild_id = staff_request_user.staff_request.summary_message_guild_id
-            summary_channel_id = (
-                staff_request_user.staff_request.summary_message_channel_id
+        # 稟議ユーザが存在しない場合はエラー
+        if transition is None:
+            await interaction.followup.send(
+                "DBエントリが見つかりませんでした。", ephemeral=True
             )
-            summary_message_id = staff_request_user.staff_request.summary_message_id
+            return
 
-            summary_guild = interaction.client.get_guild(summary_guild_id)
+        # DMメッセージを更新
+        dm_embed = interaction.message.embeds[0]
+        dm_embed.colour = discord.Color.orange()
+        dm_embed.set_footer(text="未対応")
 
-            if summary_guild is None:
-                summary_guild = await interaction.client.fetch_guild(summary_guild_id)
+        await interaction.message.edit(embed=dm_embed, view=RequestDMController())
 
-            summary_channel = summary_guild.get_channel(summary_channel_id)
+        # 既に未対応だった場合（連打・同時操作）は元メッセージを更新しない
+        if not transition.changed:
+            return
 
-            if summary_channel is None:
-                summary_channel = await summary_guild.fetch_channel(summary_channel_id)
-
-            summary_message = await summary_channel.fetch_message(summary_message_id)
-
-            await summary_message.edit(
-                embed=CommonFunctions.create_summary_embed(
-                    staff_request_user.staff_request, summary_guild
-                ),
-                view=RequestSummaryController(),
-            )
+        # 元メッセージの更新を予約
+        CommonFunctions.schedule_summary_update(interaction.client, transition)
 
 
 class RequestSummaryController(discord.ui.View):
@@ -457,29 +528,19 @@ class RequestSummaryFinishController(discord.ui.View):
                 return
 
             # DMメッセージを更新
-            for user in staff_request.pending_users:
-                _du = interaction.guild.get_member(user.user_id)
-                if _du is None:
-                    continue
-
-                _dm = await _du.create_dm()
-
-                dm_message = await _dm.fetch_message(user.dm_message_id)
-
-                if not dm_message:
-                    continue
-
-                dm_embed = dm_message.embeds[0]
-                dm_embed.colour = discord.Color.red()
-                dm_embed.set_footer(text="締め切られました")
-                await dm_message.edit(embed=dm_embed, view=None)
-
-                user.status = StaffRequestStatus.EXPIRED
+            closed_user_ids = await CommonFunctions.close_dm_messages(
+                interaction.client,
+                staff_request,
+                color=discord.Color.red(),
+                footer="締め切られました",
+            )
 
+            change_user_status(db, closed_user_ids, StaffRequestStatus.EXPIRED)
             db.commit()
             db.refresh(staff_request)
 
-            # サマリメッセージを更新
+            # 予約済みの再描画で上書きされないよう破棄してから、サマリメッセージを更新
+            summary_renderer.cancel(interaction.message.id)
             await interaction.message.edit(
                 embed=CommonFunctions.create_summary_embed(
                     staff_request,
@@ -516,29 +577,21 @@ class RequestSummaryFinishController(discord.ui.View):
                 return
 
             # DMメッセージを更新
-            for user in staff_request.pending_users:
-                _du = interaction.guild.get_member(user.user_id)
-                if _du is None:
-                    continue
-
-                _dm = await _du.create_dm()
-
-                dm_message = await _dm.fetch_message(user.dm_message_id)
-
-                if not dm_message:
-                    continue
-
-                dm_embed = dm_message.embeds[0]
-                dm_embed.colour = discord.Color.red()
-                dm_embed.set_footer(text="キャンセルされました")
-                await dm_message.edit(embed=dm_embed, view=None)
-
-                user.status = StaffRequestStatus.CANCELED_BY_REQUESTER
+            closed_user_ids = await CommonFunctions.close_dm_messages(
+                interaction.client,
+                staff_request,
+                color=discord.Color.red(),
+                footer="キャンセルされました",
+            )
 
+            change_user_status(
+                db, closed_user_ids, StaffRequestStatus.CANCELED_BY_REQUESTER
+            )
             db.commit()
             db.refresh(staff_request)
 
-            # サマリメッセージを更新
+            # 予約済みの再描画で上書きされないよう破棄してから、サマリメッセージを更新
+            summary_renderer.cancel(interaction.message.id)
             await interaction.message.edit(
                 embed=CommonFunctions.create_summary_embed(
                     staff_request,
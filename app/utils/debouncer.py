@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable
+
+
+# キー単位で処理をまとめて遅延実行する
+class KeyedDebouncer:
+    """
+    同じキーに対するscheduleをdelay秒の間まとめ、最後に渡された処理を1回だけ実行する
+    実行中に再度scheduleされた場合は、実行完了後にもう一度実行する
+    （処理は実行時点の最新状態を読み込むことを前提とする）
+    """
+
+    def __init__(self, delay: float = 2.0, name: str = "debouncer"):
+        self.delay = delay
+        self.logger = logging.getLogger("discord")
+        self.name = name
+        # key -> 実行待ちの処理
+        self._pending: dict[Hashable, Callable[[], Awaitable[None]]] = {}
+        # key -> 待機・実行中のタスク
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    def schedule(self, key: Hashable, func: Callable[[], Awaitable[None]]):
+        self._pending[key] = func
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    def cancel(self, key: Hashable):
+        """
+        実行待ちの処理を破棄する（実行中の処理も中断する）
+        """
+        self._pending.pop(key, None)
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def _run(self, key: Hashable):
+        try:
+            while key in self._pending:
+                await asyncio.sleep(self.delay)
+                func = self._pending.pop(key, None)
+                if func is None:
+                    break
+                try:
+                    await func()
+                except Exception as e:
+                    self.logger.error(f"[{self.name}] {key}: {e}")
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
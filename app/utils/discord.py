@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 
 import discord
 
@@ -28,3 +29,41 @@ class DiscordUtil:
             .add_field(name="Status", value=message)
             .set_footer(text=str(datetime.now())),
         )
+
+    @staticmethod
+    def get_partial_message(
+        bot: discord.Client,
+        channel_id: int,
+        message_id: int,
+        guild_id: Optional[int] = None,
+    ) -> discord.PartialMessage:
+        """
+        保存済みのIDからPartialMessageを作る（REST呼び出しなし）
+        チャンネルがキャッシュにない場合もPartialMessageableで組み立てるため、
+        edit/reply/deleteはそのまま1回のREST呼び出しになる
+        """
+        channel = None
+        if guild_id is not None:
+            guild = bot.get_guild(guild_id)
+            if guild is not None:
+                channel = guild.get_channel_or_thread(channel_id)
+        if channel is None:
+            channel = bot.get_channel(channel_id)
+        if channel is None or not hasattr(channel, "get_partial_message"):
+            channel = bot.get_partial_messageable(channel_id)
+        return channel.get_partial_message(message_id)
+
+    @staticmethod
+    async def get_dm_partial_message(
+        bot: discord.Client, user_id: int, message_id: int
+    ) -> discord.PartialMessage:
+        """
+        DMのPartialMessageを作る
+        DMチャンネルがキャッシュにない場合のみ、DMチャンネルの作成（REST呼び出し）を行う
+        """
+        dm_channel = await bot.create_dm(discord.Object(id=user_id))
+        return dm_channel.get_partial_message(message_id)
+
+    @staticmethod
+    def jump_url(guild_id: Optional[int], channel_id: int, message_id: int) -> str:
+        return f"https://discord.com/channels/{guild_id or '@me'}/{channel_id}/{message_id}"
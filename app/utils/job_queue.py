@@ -0,0 +1,59 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+# ジョブの処理: payloadを受け取る
+JobFunc = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+@dataclass
+class JobHandler:
+    kind: str
+    func: JobFunc
+    # 定期実行する場合の間隔（Noneなら1回限り）
+    interval: Optional[timedelta] = None
+
+
+# ジョブの種類 -> 処理の登録先
+class JobRegistry:
+    """
+    各cogが__init__で処理を登録し、ワーカー（cogs/job_worker.py）が登録済みの種類のジョブのみを取得する
+    （APIが未設定などで処理を登録しなかった種類のジョブは、DBに残ったまま実行されない）
+    """
+
+    def __init__(self):
+        self.handlers: dict[str, JobHandler] = {}
+        # ジョブが追加されたときにワーカーの待機を中断する
+        self.wakeup = asyncio.Event()
+
+    def register(
+        self, kind: str, func: JobFunc, interval: Optional[timedelta] = None
+    ) -> None:
+        self.handlers[kind] = JobHandler(kind=kind, func=func, interval=interval)
+
+    def get(self, kind: str) -> Optional[JobHandler]:
+        return self.handlers.get(kind)
+
+    def kinds(self) -> list[str]:
+        return list(self.handlers)
+
+    def recurring(self) -> list[JobHandler]:
+        return [
+            handler
+            for handler in self.handlers.values()
+            if handler.interval is not None
+        ]
+
+    def wake(self, _=None) -> None:
+        self.wakeup.set()
+
+
+def retry_delay(attempts: int, cap: float = 60 * 60) -> timedelta:
+    """
+    失敗したジョブの再実行までの時間（30秒から倍々、capで頭打ち）
+    """
+    return timedelta(seconds=min(30 * 2 ** max(attempts - 1, 0), cap))
+
+
+job_registry = JobRegistry()
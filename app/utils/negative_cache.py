@@ -0,0 +1,50 @@
+import time
+from typing import Optional
+
+
+# 権限不足・ロール階層による失敗のキャッシュ
+class NegativeCache:
+    """
+    (guild, member, action) 単位で失敗した操作を記録する
+    ロールや順序が変わった場合はinvalidate_*で破棄する
+    """
+
+    def __init__(self, ttl: Optional[float] = 6 * 60 * 60):
+        """
+        ttl: 念のための有効期限(秒)、Noneなら無期限
+        """
+        self.ttl = ttl
+        # guild_id -> {(member_id, action): 記録時刻}
+        self.memory: dict[int, dict[tuple[int, str], float]] = {}
+
+    def add(self, guild_id: int, member_id: int, action: str):
+        self.memory.setdefault(guild_id, {})[(member_id, action)] = time.monotonic()
+
+    def contains(self, guild_id: int, member_id: int, action: str) -> bool:
+        entries = self.memory.get(guild_id)
+        if not entries:
+            return False
+
+        recorded_at = entries.get((member_id, action))
+        if recorded_at is None:
+            return False
+
+        if self.ttl is not None and time.monotonic() - recorded_at > self.ttl:
+            del entries[(member_id, action)]
+            return False
+
+        return True
+
+    def invalidate_member(self, guild_id: int, member_id: int):
+        entries = self.memory.get(guild_id)
+        if not entries:
+            return
+
+        for key in [key for key in entries if key[0] == member_id]:
+            del entries[key]
+
+    def invalidate_guild(self, guild_id: int):
+        self.memory.pop(guild_id, None)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.memory.values())
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+
+import discord
+
+
+# ニックネーム同期キュー
+class NickSyncQueue:
+    """
+    ギルドごとにニックネーム変更を順番に反映する
+    - 現在のニックネーム（反映待ちがあればその値）と同じであればキューに積まない
+    - 最後に反映したニックネームを (guild, member) 単位で記録し、
+      メンバーのキャッシュが反映前の値のままでも同じ変更を積み直さない
+    - 同一メンバーの変更が溜まっている場合は最新の値だけを反映する
+    - ギルドごとにintervalの間隔を空けて反映し、member編集のレート制限に収める
+    """
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        on_forbidden: Optional[Callable[[discord.Member], None]] = None,
+    ):
+        self.interval = interval
+        self.on_forbidden = on_forbidden
+        self.logger = logging.getLogger("NickSyncQueue")
+
+        # (guild_id, member_id) -> (最後に反映したニックネーム, 反映前のニックネーム)
+        # メンバー更新イベントでキャッシュが追いついたら破棄する（observe）
+        self.last_applied: dict[tuple[int, int], tuple[str, Optional[str]]] = {}
+
+        # guild_id -> {member_id: (member, nick)}
+        self.pending: dict[int, dict[int, tuple[discord.Member, str]]] = {}
+        self.workers: dict[int, asyncio.Task] = {}
+
+    def needs_update(self, member: discord.Member, nick: str) -> bool:
+        pending = self.pending.get(member.guild.id, {}).get(member.id)
+        if pending is not None:
+            return pending[1] != nick
+        if member.nick == nick:
+            return False
+
+        # 反映済みだが、キャッシュのmember.nickが反映前の値のまま
+        last = self.last_applied.get((member.guild.id, member.id))
+        if last is not None and last == (nick, member.nick):
+            return False
+        return True
+
+    def observe(self, member: discord.Member):
+        """
+        メンバー更新イベントでニックネームの変化を受け取った場合に呼ぶ
+        キャッシュが最新になったため、反映の記録を破棄する
+        """
+        self.last_applied.pop((member.guild.id, member.id), None)
+
+    def enqueue(self, member: discord.Member, nick: str) -> bool:
+        """
+        変更が必要な場合のみキューに積む
+        積んだ場合はTrueを返す
+        """
+        guild_id = member.guild.id
+
+        if not self.needs_update(member, nick):
+            return False
+
+        self.pending.setdefault(guild_id, {})[member.id] = (member, nick)
+
+        worker = self.workers.get(guild_id)
+        if worker is None or worker.done():
+            self.workers[guild_id] = asyncio.create_task(self._run(guild_id))
+
+        return True
+
+    def pending_count(self, guild_id: Optional[int] = None) -> int:
+        if guild_id is not None:
+            return len(self.pending.get(guild_id, {}))
+        return sum(len(entries) for entries in self.pending.values())
+
+    def forget(self, guild_id: int, member_id: Optional[int] = None):
+        """記録を破棄する（メンバー退出・ギルド退出時）"""
+        if member_id is None:
+            self.pending.pop(guild_id, None)
+            for key in [key for key in self.last_applied if key[0] == guild_id]:
+                del self.last_applied[key]
+            return
+
+        self.pending.get(guild_id, {}).pop(member_id, None)
+        self.last_applied.pop((guild_id, member_id), None)
+
+    async def _run(self, guild_id: int):
+        while self.pending.get(guild_id):
+            entries = self.pending[guild_id]
+            member_id = next(iter(entries))
+            member, nick = entries.pop(member_id)
+
+            try:
+                before = member.nick
+                await member.edit(nick=nick)
+                self.last_applied[(guild_id, member_id)] = (nick, before)
+            except discord.Forbidden:
+                self.logger.info(
+                    f"Failed to update nickname for {member.name} in {member.guild.name}"
+                )
+                if self.on_forbidden is not None:
+                    self.on_forbidden(member)
+            except discord.HTTPException as e:
+                self.logger.error(
+                    f"Failed to update nickname for {member.name} in {member.guild.name}: {e}"
+                )
+
+            await asyncio.sleep(self.interval)
+
+        self.workers.pop(guild_id, None)
+
+    def close(self):
+        for worker in self.workers.values():
+            worker.cancel()
+        self.workers.clear()
+        self.pending.clear()
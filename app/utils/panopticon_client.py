@@ -1,10 +1,43 @@
 """Panopticon APIクライアント"""
 
+import asyncio
+import json
 import logging
-from typing import Optional
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Generic, Optional, TypeVar
 
 import httpx
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from pydantic import dataclasses as pydantic_dataclasses
+
+from core import get_settings
+from utils.panopticon_metrics import PanopticonMetrics
+from utils.panopticon_rate_limit import TokenBucket
+from utils.panopticon_resilience import (
+    AdaptiveTimeout,
+    CircuitBreaker,
+    PanopticonUnavailableError,
+    RetryPolicy,
+)
+
+__all__ = ["PanopticonClient", "PanopticonUnavailableError"]
+
+# リトライ対象のステータスコード
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+# サーバーが対応している機能を通知するヘッダー（カンマ区切り）
+FEATURES_HEADER = "X-Panopticon-Features"
+FEATURE_USERS_BULK = "users-bulk"
+
+# /api/users/bulk に1回で渡すID数
+USERS_BULK_CHUNK_SIZE = 100
+
+# 冪等でないリクエストのタイムアウト(秒)
+# 途中で打ち切ると結果が不明になるため、応答時間によらず固定値とする
+NON_IDEMPOTENT_TIMEOUT = 30.0
+
+T = TypeVar("T")
 
 
 # レスポンススキーマ
@@ -13,13 +46,16 @@ class LinkStartResponse(BaseModel):
     expires_at: str
 
 
-class DiscordInfo(BaseModel):
+# link_bulkは数千件単位で返るため、以下の連携情報はslots付きの軽量なdataclassとする
+@pydantic_dataclasses.dataclass(slots=True)
+class DiscordInfo:
     id: int
     discord_id: str
     username: str
 
 
-class UserInfo(BaseModel):
+@pydantic_dataclasses.dataclass(slots=True)
+class UserInfo:
     id: int
     name: str
     unix_name: str
@@ -32,24 +68,27 @@ class LinkRecheckResponse(BaseModel):
     jp_member: bool
 
 
-class BulkSiteMembership(BaseModel):
+@pydantic_dataclasses.dataclass(slots=True)
+class BulkSiteMembership:
     id: int
     site_id: int
-    site_unix_name: Optional[str] = None
-    site_name: Optional[str] = None
     joined_at: str
     is_resigned: bool
+    site_unix_name: Optional[str] = None
+    site_name: Optional[str] = None
 
 
-class LinkedAccount(BaseModel):
+@pydantic_dataclasses.dataclass(slots=True)
+class LinkedAccount:
     id: int
     user: UserInfo
     discord: DiscordInfo
     created_at: str
-    site_memberships: list[BulkSiteMembership] = []
+    site_memberships: list[BulkSiteMembership] = field(default_factory=list)
 
 
-class BulkAccountInfo(BaseModel):
+@pydantic_dataclasses.dataclass(slots=True)
+class BulkAccountInfo:
     discord_id: str
     linked: bool
     account: Optional[LinkedAccount] = None
@@ -125,15 +164,104 @@ class SiteMembership(BaseModel):
     site: Optional[Site] = None
 
 
+# レスポンスのエンベロープ
+# resp.json()でdictを経由せず、生のバイト列から直接検証する
+class Envelope(BaseModel, Generic[T]):
+    data: T
+
+
+class BulkAccountsData(BaseModel):
+    accounts: list[BulkAccountInfo]
+
+
+class ApplicationsEnvelope(BaseModel):
+    data: list[Application]
+    pagination: Pagination
+
+
+LINK_START_ADAPTER = TypeAdapter(Envelope[LinkStartResponse])
+LINK_RECHECK_ADAPTER = TypeAdapter(Envelope[LinkRecheckResponse])
+LINK_BULK_ADAPTER = TypeAdapter(Envelope[BulkAccountsData])
+SITES_ADAPTER = TypeAdapter(Envelope[list[Site]])
+APPLICATIONS_ADAPTER = TypeAdapter(ApplicationsEnvelope)
+DECLINE_REASON_TYPES_ADAPTER = TypeAdapter(Envelope[list[DeclineReasonType]])
+USER_ADAPTER = TypeAdapter(Envelope[UserWithPermissions])
+USERS_BULK_ADAPTER = TypeAdapter(Envelope[dict[str, list[UserWithPermissions]]])
+SITE_MEMBERSHIPS_ADAPTER = TypeAdapter(Envelope[list[SiteMembership]])
+
+
+@dataclass
+class PanopticonSharedState:
+    """
+    同じPanopticonインスタンスを指すクライアント間で共有する状態
+    クライアントは操作ごとに生成されるため、状態はbase_url単位でプロセス全体に保持する
+    """
+
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy)
+    # endpoint -> タイムアウト
+    timeouts: dict[str, AdaptiveTimeout] = field(default_factory=dict)
+    metrics: PanopticonMetrics = field(default_factory=PanopticonMetrics)
+    # サーバーが通知した対応機能
+    features: set[str] = field(default_factory=set)
+    # user_id -> (有効期限, ユーザー情報)
+    user_cache: dict[int, tuple[float, "UserWithPermissions"]] = field(
+        default_factory=dict
+    )
+    # endpoint -> レート制限
+    limiters: dict[str, TokenBucket] = field(default_factory=dict)
+    # リクエストキー -> (ETag, parse済みの結果)
+    validators: dict[tuple, tuple[str, object]] = field(default_factory=dict)
+    # リクエストキー -> 実行中のタスク（singleflight）
+    inflight: dict[tuple, asyncio.Task] = field(default_factory=dict)
+    # 他のリクエストに相乗りした件数
+    coalesced_count: int = 0
+
+    def timeout_for(self, endpoint: str) -> AdaptiveTimeout:
+        if endpoint not in self.timeouts:
+            self.timeouts[endpoint] = AdaptiveTimeout()
+        return self.timeouts[endpoint]
+
+    def limiter_for(self, endpoint: str) -> TokenBucket:
+        if endpoint not in self.limiters:
+            settings = get_settings()
+            self.limiters[endpoint] = TokenBucket(
+                rate=settings.PANOPTICON_RATE_LIMIT_OVERRIDES.get(
+                    endpoint, settings.PANOPTICON_RATE_LIMIT_PER_SECOND
+                ),
+                burst=settings.PANOPTICON_RATE_LIMIT_BURST,
+            )
+        return self.limiters[endpoint]
+
+
 class PanopticonClient:
     """Panopticon APIクライアント"""
 
-    def __init__(self, base_url: str, api_key: str) -> None:
+    # base_url -> 共有状態
+    _shared_states: dict[str, PanopticonSharedState] = {}
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
+        # 試験用にtransportを差し替えられる（utils.panopticon_fake等）
+        self.transport = transport
         self._client: Optional[httpx.AsyncClient] = None
         self.logger = logging.getLogger("PanopticonClient")
 
+        if self.base_url not in self._shared_states:
+            self._shared_states[self.base_url] = PanopticonSharedState()
+        self.state = self._shared_states[self.base_url]
+
+    @classmethod
+    def shared_states(cls) -> dict[str, PanopticonSharedState]:
+        """/status等での表示用"""
+        return dict(cls._shared_states)
+
     @property
     def client(self) -> httpx.AsyncClient:
         if self._client is None:
@@ -144,14 +272,184 @@ class PanopticonClient:
                     "Origin": self.base_url,  # CSRF対策のためOriginヘッダーを追加
                 },
                 timeout=30.0,
+                transport=self.transport,
+                event_hooks={
+                    "request": [self._on_request],
+                    "response": [self._on_response],
+                },
             )
         return self._client
 
+    # ========== メトリクス ==========
+
+    async def _on_request(self, request: httpx.Request):
+        request.extensions["panopticon_started"] = time.monotonic()
+
+    async def _on_response(self, response: httpx.Response):
+        features = response.headers.get(FEATURES_HEADER)
+        if features is not None:
+            self.state.features = {f.strip() for f in features.split(",") if f.strip()}
+
+        request = response.request
+        started = request.extensions.get("panopticon_started")
+        if started is None:
+            return
+        # 呼び出し元でも全体を読むため、ここで読み込んでサイズを記録する
+        await response.aread()
+        self.state.metrics.endpoint(
+            request.extensions.get("panopticon_endpoint", request.url.path)
+        ).observe(
+            latency=time.monotonic() - started,
+            status_code=response.status_code,
+            sent=len(request.content),
+            received=len(response.content),
+        )
+
     async def close(self) -> None:
         if self._client:
             await self._client.aclose()
             self._client = None
 
+    async def _request(
+        self,
+        endpoint: str,
+        method: str,
+        url: str,
+        *,
+        idempotent: bool,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        リトライ・タイムアウト・サーキットブレーカーを適用してリクエストを送信する
+        - エンドポイントごとのレート制限に従い、対話的な操作をバックグラウンド処理より優先する
+        - 冪等なリクエストは接続エラー・タイムアウト・5xx/429でjitter付きリトライ
+        - 失敗が続いた場合はブレーカーを開き、PanopticonUnavailableErrorで即座に失敗させる
+        - 最終的な応答が成功でなければHTTPStatusErrorを送出する
+        """
+        breaker = self.state.breaker
+        policy = self.state.retry_policy
+        adaptive_timeout = self.state.timeout_for(endpoint)
+        metrics = self.state.metrics.endpoint(endpoint)
+        limiter = self.state.limiter_for(endpoint)
+        max_attempts = policy.max_attempts if idempotent else 1
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if attempt > 1:
+                metrics.retries += 1
+            await limiter.acquire()
+            breaker.before_request()
+
+            timeout = adaptive_timeout.value if idempotent else NON_IDEMPOTENT_TIMEOUT
+            started = time.monotonic()
+            resp: Optional[httpx.Response] = None
+            try:
+                resp = await self.client.request(
+                    method,
+                    url,
+                    timeout=timeout,
+                    extensions={"panopticon_endpoint": endpoint},
+                    **kwargs,
+                )
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                metrics.transport_errors += 1
+                # 応答が遅くなった場合に、小さいタイムアウトのまま失敗し続けないようにする
+                if idempotent and isinstance(e, httpx.TimeoutException):
+                    adaptive_timeout.backoff()
+                self.logger.warning(
+                    f"{endpoint} transport error (attempt {attempt}/{max_attempts}): {e!r}"
+                )
+                if attempt >= max_attempts:
+                    raise
+                await asyncio.sleep(policy.backoff(attempt))
+                continue
+            finally:
+                # キャンセル等で結果が記録されなかった場合
+                if resp is None and breaker.probing:
+                    breaker.release_probe()
+
+            if resp.status_code >= 500 or resp.status_code == 429:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+                adaptive_timeout.observe(time.monotonic() - started)
+
+            if resp.status_code in RETRYABLE_STATUS_CODES and attempt < max_attempts:
+                retry_after = None
+                if resp.headers.get("Retry-After", "").isdigit():
+                    retry_after = float(resp.headers["Retry-After"])
+                self.logger.warning(
+                    f"{endpoint} API error {resp.status_code} "
+                    f"(attempt {attempt}/{max_attempts}), retrying"
+                )
+                await asyncio.sleep(policy.backoff(attempt, retry_after))
+                continue
+
+            # 条件付きリクエストで変更がなかった場合（呼び出し元でキャッシュを使う）
+            if resp.status_code == 304:
+                return resp
+
+            if not resp.is_success:
+                self.logger.error(
+                    f"{endpoint} API error {resp.status_code}: {resp.text}"
+                )
+            resp.raise_for_status()
+            return resp
+
+    async def _fetch(
+        self,
+        endpoint: str,
+        method: str,
+        url: str,
+        parse: Callable[[httpx.Response], T],
+        conditional: bool = False,
+        **kwargs,
+    ) -> T:
+        """
+        冪等なリクエストを送信し、parseした結果を返す
+        同じリクエストが実行中であれば新たに送信せず、その結果を共有する
+        conditional=Trueの場合はETagを保持して条件付きリクエストを送り、304なら前回の結果を返す
+        結果のオブジェクトは呼び出し元間で共有されるため、変更しないこと
+        """
+        key = (endpoint, method, url, json.dumps(kwargs, sort_keys=True, default=str))
+
+        task = self.state.inflight.get(key)
+        if task is not None:
+            self.state.coalesced_count += 1
+        else:
+
+            async def run() -> T:
+                cached = self.state.validators.get(key) if conditional else None
+                headers = {"If-None-Match": cached[0]} if cached else None
+
+                resp = await self._request(
+                    endpoint, method, url, idempotent=True, headers=headers, **kwargs
+                )
+                if resp.status_code == 304 and cached:
+                    return cached[1]
+
+                result = parse(resp)
+                etag = resp.headers.get("ETag")
+                if conditional and etag:
+                    self.state.validators[key] = (etag, result)
+                return result
+
+            task = asyncio.create_task(run())
+            self.state.inflight[key] = task
+            task.add_done_callback(lambda t: self._finish_inflight(key, t))
+
+        # 呼び出し元の1つがキャンセルされても、他の待機者のためにリクエストは継続する
+        return await asyncio.shield(task)
+
+    def _finish_inflight(self, key: tuple, task: asyncio.Task):
+        if self.state.inflight.get(key) is task:
+            del self.state.inflight[key]
+        # 待機者が全員キャンセルされた場合の未取得例外の警告を防ぐ
+        if not task.cancelled():
+            task.exception()
+
     # ========== Link API ==========
 
     async def link_start(
@@ -162,8 +460,11 @@ class PanopticonClient:
         avatar: Optional[str] = None,
     ) -> LinkStartResponse:
         """連携開始URL取得"""
-        resp = await self.client.post(
+        resp = await self._request(
+            "link_start",
+            "POST",
             "/api/link/start",
+            idempotent=False,
             json={
                 "discord_id": discord_id,
                 "username": username,
@@ -171,10 +472,7 @@ class PanopticonClient:
                 "avatar": avatar,
             },
         )
-        if not resp.is_success:
-            self.logger.error(f"link_start API error {resp.status_code}: {resp.text}")
-        resp.raise_for_status()
-        return LinkStartResponse(**resp.json()["data"])
+        return LINK_START_ADAPTER.validate_json(resp.content).data
 
     async def link_recheck(
         self,
@@ -184,8 +482,11 @@ class PanopticonClient:
         avatar: Optional[str] = None,
     ) -> LinkRecheckResponse:
         """連携情報再チェック（jp_member含む）"""
-        resp = await self.client.post(
+        return await self._fetch(
+            "link_recheck",
+            "POST",
             "/api/link/recheck",
+            lambda resp: LINK_RECHECK_ADAPTER.validate_json(resp.content).data,
             json={
                 "discord_id": discord_id,
                 "username": username,
@@ -193,31 +494,30 @@ class PanopticonClient:
                 "avatar": avatar,
             },
         )
-        if not resp.is_success:
-            self.logger.error(f"link_recheck API error {resp.status_code}: {resp.text}")
-        resp.raise_for_status()
-        return LinkRecheckResponse(**resp.json()["data"])
 
     async def link_bulk(self, discord_ids: list[str]) -> list[BulkAccountInfo]:
         """複数Discord IDの連携情報取得"""
-        resp = await self.client.post(
+        return await self._fetch(
+            "link_bulk",
+            "POST",
             "/api/link/bulk",
+            lambda resp: LINK_BULK_ADAPTER.validate_json(resp.content).data.accounts,
             json={
                 "discord_ids": discord_ids,
             },
         )
-        if not resp.is_success:
-            self.logger.error(f"link_bulk API error {resp.status_code}: {resp.text}")
-        resp.raise_for_status()
-        return [BulkAccountInfo(**a) for a in resp.json()["data"]["accounts"]]
 
     # ========== Sites API ==========
 
     async def get_sites(self) -> list[Site]:
         """サイト一覧取得"""
-        resp = await self.client.get("/api/sites")
-        resp.raise_for_status()
-        return [Site(**s) for s in resp.json()["data"]]
+        return await self._fetch(
+            "get_sites",
+            "GET",
+            "/api/sites",
+            lambda resp: SITES_ADAPTER.validate_json(resp.content).data,
+            conditional=True,
+        )
 
     async def get_applications(
         self,
@@ -231,23 +531,66 @@ class PanopticonClient:
         if status is not None:
             params["status"] = status
 
-        resp = await self.client.get(
+        def parse(resp: httpx.Response) -> tuple[list[Application], Pagination]:
+            envelope = APPLICATIONS_ADAPTER.validate_json(resp.content)
+            return envelope.data, envelope.pagination
+
+        return await self._fetch(
+            "get_applications",
+            "GET",
             f"/api/sites/{site_unix_name}/applications",
+            parse,
             params=params,
         )
-        resp.raise_for_status()
-        data = resp.json()
-        return (
-            [Application(**a) for a in data["data"]],
-            Pagination(**data["pagination"]),
+
+    async def iter_applications(
+        self,
+        site_unix_name: str,
+        status: Optional[int] = None,
+        per_page: int = 100,
+        prefetch: bool = True,
+    ) -> AsyncIterator[Application]:
+        """
+        参加申請を全ページにわたって順に返す
+        prefetch=Trueの場合、現在のページを処理している間に次のページを取得しておく
+        呼び出し元が途中で抜けた場合、取得中のページはキャンセルする
+        """
+        page = 1
+        next_page: Optional[asyncio.Task] = asyncio.create_task(
+            self.get_applications(site_unix_name, status, page, per_page)
         )
+        try:
+            while next_page is not None:
+                applications, pagination = await next_page
+                next_page = None
+
+                has_next = page < pagination.totalPages
+                if has_next:
+                    page += 1
+                if has_next and prefetch:
+                    next_page = asyncio.create_task(
+                        self.get_applications(site_unix_name, status, page, per_page)
+                    )
+
+                for application in applications:
+                    yield application
+
+                if has_next and not prefetch:
+                    next_page = asyncio.create_task(
+                        self.get_applications(site_unix_name, status, page, per_page)
+                    )
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
 
     async def approve_application(self, site_unix_name: str, app_id: int) -> None:
         """参加申請承認"""
-        resp = await self.client.post(
-            f"/api/sites/{site_unix_name}/applications/{app_id}/approve"
+        await self._request(
+            "approve_application",
+            "POST",
+            f"/api/sites/{site_unix_name}/applications/{app_id}/approve",
+            idempotent=False,
         )
-        resp.raise_for_status()
 
     async def decline_application(
         self,
@@ -257,31 +600,119 @@ class PanopticonClient:
         reason_detail: Optional[str] = None,
     ) -> None:
         """参加申請拒否"""
-        resp = await self.client.post(
+        await self._request(
+            "decline_application",
+            "POST",
             f"/api/sites/{site_unix_name}/applications/{app_id}/decline",
+            idempotent=False,
             json={"reasonType": reason_type, "reasonDetail": reason_detail},
         )
-        resp.raise_for_status()
 
     async def get_decline_reason_types(self) -> list[DeclineReasonType]:
         """拒否理由タイプ一覧取得"""
-        resp = await self.client.get("/api/sites/applications/decline-reason-types")
-        resp.raise_for_status()
-        return [DeclineReasonType(**t) for t in resp.json()["data"]]
+        return await self._fetch(
+            "get_decline_reason_types",
+            "GET",
+            "/api/sites/applications/decline-reason-types",
+            lambda resp: DECLINE_REASON_TYPES_ADAPTER.validate_json(resp.content).data,
+            conditional=True,
+        )
 
     # ========== Users API ==========
 
     async def get_user(self, user_id: int) -> UserWithPermissions:
         """ユーザー情報取得（ロール・権限含む）"""
-        resp = await self.client.get(f"/api/users/{user_id}")
-        resp.raise_for_status()
-        return UserWithPermissions(**resp.json()["data"])
+        return await self._fetch(
+            "get_user",
+            "GET",
+            f"/api/users/{user_id}",
+            lambda resp: USER_ADAPTER.validate_json(resp.content).data,
+        )
+
+    async def get_users(self, user_ids: list[int]) -> dict[int, UserWithPermissions]:
+        """
+        複数ユーザーの情報をまとめて取得する（存在しないユーザーは含まれない）
+        サーバーが一括取得に対応していれば /api/users/bulk を使い、
+        そうでなければ同時実行数を制限して get_user を並行に呼ぶ
+        取得結果はPANOPTICON_USER_CACHE_TTL秒の間キャッシュする
+        """
+        settings = get_settings()
+        cache = self.state.user_cache
+        now = time.monotonic()
+
+        result: dict[int, UserWithPermissions] = {}
+        missing: list[int] = []
+        for user_id in dict.fromkeys(user_ids):
+            cached = cache.get(user_id)
+            if cached is not None and cached[0] > now:
+                result[user_id] = cached[1]
+            else:
+                missing.append(user_id)
+
+        if not missing:
+            return result
+
+        if FEATURE_USERS_BULK in self.state.features:
+            fetched = await self._get_users_bulk(missing)
+        else:
+            fetched = await self._get_users_concurrently(
+                missing, settings.PANOPTICON_USERS_CONCURRENCY
+            )
+
+        expires_at = time.monotonic() + settings.PANOPTICON_USER_CACHE_TTL
+        for user_id, user in fetched.items():
+            cache[user_id] = (expires_at, user)
+        if len(cache) > 10_000:
+            for user_id in [k for k, v in cache.items() if v[0] <= now]:
+                del cache[user_id]
+
+        result.update(fetched)
+        return result
+
+    async def _get_users_bulk(
+        self, user_ids: list[int]
+    ) -> dict[int, UserWithPermissions]:
+        result: dict[int, UserWithPermissions] = {}
+        for i in range(0, len(user_ids), USERS_BULK_CHUNK_SIZE):
+            users = await self._fetch(
+                "get_users_bulk",
+                "POST",
+                "/api/users/bulk",
+                lambda resp: USERS_BULK_ADAPTER.validate_json(resp.content).data[
+                    "users"
+                ],
+                json={"user_ids": user_ids[i : i + USERS_BULK_CHUNK_SIZE]},
+            )
+            result.update({user.user.id: user for user in users})
+        return result
+
+    async def _get_users_concurrently(
+        self, user_ids: list[int], concurrency: int
+    ) -> dict[int, UserWithPermissions]:
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def fetch(user_id: int) -> Optional[UserWithPermissions]:
+            async with semaphore:
+                try:
+                    return await self.get_user(user_id)
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code == 404:
+                        return None
+                    raise
+
+        users = await asyncio.gather(*[fetch(user_id) for user_id in user_ids])
+        return {
+            user_id: user for user_id, user in zip(user_ids, users) if user is not None
+        }
 
     async def get_user_site_memberships(self, user_id: int) -> list[SiteMembership]:
         """ユーザーのサイトメンバーシップ取得"""
-        resp = await self.client.get(f"/api/users/{user_id}/site-memberships")
-        resp.raise_for_status()
-        return [SiteMembership(**m) for m in resp.json()["data"]]
+        return await self._fetch(
+            "get_user_site_memberships",
+            "GET",
+            f"/api/users/{user_id}/site-memberships",
+            lambda resp: SITE_MEMBERSHIPS_ADAPTER.validate_json(resp.content).data,
+        )
 
     # ========== Members API ==========
 
@@ -289,11 +720,13 @@ class PanopticonClient:
         self, site_unix_name: str, user_id: int, action: str
     ) -> None:
         """権限変更（action: "grant" または "revoke"）"""
-        resp = await self.client.post(
+        await self._request(
+            "change_privilege",
+            "POST",
             f"/api/sites/{site_unix_name}/members/{user_id}/privilege",
+            idempotent=False,
             json={"action": action},
         )
-        resp.raise_for_status()
 
     # ========== ヘルパーメソッド ==========
 
@@ -0,0 +1,463 @@
+"""
+Panopticon APIのローカル代替実装（負荷試験・結合試験用）
+
+httpx.MockTransport経由:
+    fake = FakePanopticon(linked_accounts=100_000, latency=0.05)
+    client = PanopticonClient("http://panopticon.test", "dummy", transport=fake.transport())
+
+ASGIアプリとして:
+    httpx.ASGITransport(app=fake) や uvicorn等のASGIサーバーにそのまま渡せる
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from urllib.parse import parse_qs
+
+import httpx
+
+# 連携済みアカウントのDiscord IDはこの値から連番で割り当てる
+DISCORD_ID_BASE = 100_000_000_000_000_000
+
+DECLINE_REASON_TYPES = [
+    {"id": 1, "name": "合言葉なし", "description": "合言葉が含まれていません"},
+    {"id": 2, "name": "規約違反", "description": "利用規約に違反しています"},
+    {"id": 9, "name": "その他", "description": "その他の理由"},
+]
+
+
+@dataclass
+class FakeResponse:
+    status: int
+    body: dict = field(default_factory=dict)
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+class FakePanopticon:
+    """
+    /api/link/*, /api/sites/*, /api/users/* を本物と同じエンベロープで返す
+    データセットはseedから決定的に生成し、アカウントは要求時に添字から組み立てる
+    """
+
+    def __init__(
+        self,
+        linked_accounts: int = 1_000,
+        sites: int = 3,
+        applications_per_site: int = 250,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        bulk_users: bool = False,
+        seed: int = 0,
+    ):
+        self.linked_accounts = linked_accounts
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # /api/users/bulk を提供し、X-Panopticon-Featuresで通知する
+        self.bulk_users = bulk_users
+        self.random = random.Random(seed)  # nosec B311
+
+        self.sites = [
+            {"id": i + 1, "name": f"Site {i + 1}", "unixName": f"site-{i + 1}"}
+            for i in range(sites)
+        ]
+        # site_unix_name -> 申請一覧
+        self.applications: dict[str, list[dict]] = {
+            site["unixName"]: [
+                self._make_application(site["id"], n)
+                for n in range(applications_per_site)
+            ]
+            for site in self.sites
+        }
+        # (site_unix_name, user_id) -> "grant" / "revoke"
+        self.privileges: dict[tuple[str, int], str] = {}
+
+        # path -> 受信件数
+        self.request_counts: dict[str, int] = {}
+
+        self.routes: list[tuple[str, re.Pattern, Callable[..., FakeResponse]]] = [
+            ("POST", re.compile(r"/api/link/start"), self._link_start),
+            ("POST", re.compile(r"/api/link/recheck"), self._link_recheck),
+            ("POST", re.compile(r"/api/link/bulk"), self._link_bulk),
+            ("GET", re.compile(r"/api/sites"), self._get_sites),
+            (
+                "GET",
+                re.compile(r"/api/sites/applications/decline-reason-types"),
+                self._get_decline_reason_types,
+            ),
+            (
+                "GET",
+                re.compile(r"/api/sites/(?P<site>[^/]+)/applications"),
+                self._get_applications,
+            ),
+            (
+                "POST",
+                re.compile(
+                    r"/api/sites/(?P<site>[^/]+)/applications/(?P<app_id>\d+)/(?P<action>approve|decline)"
+                ),
+                self._review_application,
+            ),
+            (
+                "POST",
+                re.compile(
+                    r"/api/sites/(?P<site>[^/]+)/members/(?P<user_id>\d+)/privilege"
+                ),
+                self._change_privilege,
+            ),
+            ("POST", re.compile(r"/api/users/bulk"), self._get_users_bulk),
+            ("GET", re.compile(r"/api/users/(?P<user_id>\d+)"), self._get_user),
+            (
+                "GET",
+                re.compile(r"/api/users/(?P<user_id>\d+)/site-memberships"),
+                self._get_site_memberships,
+            ),
+        ]
+
+    # ========== データセット ==========
+
+    def _account_index(self, discord_id: str) -> Optional[int]:
+        if not discord_id.isdigit():
+            return None
+        index = int(discord_id) - DISCORD_ID_BASE
+        if 0 <= index < self.linked_accounts:
+            return index
+        return None
+
+    def discord_ids(self, count: Optional[int] = None) -> list[str]:
+        """連携済みとして扱われるDiscord ID（負荷試験の入力用）"""
+        count = self.linked_accounts if count is None else count
+        return [str(DISCORD_ID_BASE + i) for i in range(count)]
+
+    def _user(self, index: int) -> dict:
+        return {"id": index + 1, "name": f"User{index}", "unix_name": f"user{index}"}
+
+    def _discord(self, index: int) -> dict:
+        return {
+            "id": index + 1,
+            "discord_id": str(DISCORD_ID_BASE + index),
+            "username": f"discord{index}",
+        }
+
+    def _is_jp_member(self, index: int) -> bool:
+        return index % 3 != 0
+
+    def _bulk_memberships(self, index: int) -> list[dict]:
+        if not self._is_jp_member(index):
+            return []
+        site = self.sites[index % len(self.sites)]
+        return [
+            {
+                "id": index + 1,
+                "site_id": site["id"],
+                "site_unix_name": site["unixName"],
+                "site_name": site["name"],
+                "joined_at": "2020-01-01T00:00:00Z",
+                "is_resigned": False,
+            }
+        ]
+
+    def _account(self, index: int) -> dict:
+        return {
+            "id": index + 1,
+            "user": self._user(index),
+            "discord": self._discord(index),
+            "created_at": "2020-01-01T00:00:00Z",
+            "site_memberships": self._bulk_memberships(index),
+        }
+
+    def _make_application(self, site_id: int, n: int) -> dict:
+        user_id = self.random.randrange(1, max(self.linked_accounts, 1) + 1)
+        return {
+            "id": site_id * 1_000_000 + n + 1,
+            "siteId": site_id,
+            "userId": user_id,
+            "acquiredAt": "2020-01-01T00:00:00Z",
+            "text": f"参加申請 {n} 合言葉",
+            "status": 0,
+            "user": {
+                "id": user_id,
+                "name": f"User{user_id - 1}",
+                "unixName": f"user{user_id - 1}",
+                "avatarUrl": None,
+            },
+            "correctPassword": "合言葉",
+        }
+
+    # ========== ハンドラ ==========
+
+    def _link_start(self, body: dict, query: dict) -> FakeResponse:
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=10)
+        return FakeResponse(
+            200,
+            {
+                "data": {
+                    "link_url": f"http://panopticon.test/link/{body.get('discord_id')}",
+                    "expires_at": expires_at.isoformat(),
+                }
+            },
+        )
+
+    def _link_recheck(self, body: dict, query: dict) -> FakeResponse:
+        discord_id = str(body.get("discord_id", ""))
+        index = self._account_index(discord_id)
+        if index is None:
+            return FakeResponse(
+                200,
+                {
+                    "data": {
+                        "linked": False,
+                        "discord": {
+                            "id": 0,
+                            "discord_id": discord_id,
+                            "username": body.get("username", ""),
+                        },
+                        "user": None,
+                        "jp_member": False,
+                    }
+                },
+            )
+        return FakeResponse(
+            200,
+            {
+                "data": {
+                    "linked": True,
+                    "discord": self._discord(index),
+                    "user": self._user(index),
+                    "jp_member": self._is_jp_member(index),
+                }
+            },
+        )
+
+    def _link_bulk(self, body: dict, query: dict) -> FakeResponse:
+        accounts = []
+        for discord_id in body.get("discord_ids", []):
+            index = self._account_index(str(discord_id))
+            if index is None:
+                accounts.append({"discord_id": str(discord_id), "linked": False})
+            else:
+                accounts.append(
+                    {
+                        "discord_id": str(discord_id),
+                        "linked": True,
+                        "account": self._account(index),
+                    }
+                )
+        return FakeResponse(200, {"data": {"accounts": accounts}})
+
+    def _get_sites(self, body: dict, query: dict) -> FakeResponse:
+        return FakeResponse(200, {"data": self.sites})
+
+    def _get_decline_reason_types(self, body: dict, query: dict) -> FakeResponse:
+        return FakeResponse(200, {"data": DECLINE_REASON_TYPES})
+
+    def _get_applications(self, body: dict, query: dict, site: str) -> FakeResponse:
+        if site not in self.applications:
+            return FakeResponse(404, {"error": "site not found"})
+
+        applications = self.applications[site]
+        if "status" in query:
+            applications = [
+                a for a in applications if a["status"] == int(query["status"])
+            ]
+
+        page = max(int(query.get("page", 1)), 1)
+        per_page = max(int(query.get("per_page", 100)), 1)
+        total_pages = max((len(applications) + per_page - 1) // per_page, 1)
+        return FakeResponse(
+            200,
+            {
+                "data": applications[(page - 1) * per_page : page * per_page],
+                "pagination": {
+                    "total": len(applications),
+                    "page": page,
+                    "perPage": per_page,
+                    "totalPages": total_pages,
+                },
+            },
+        )
+
+    def _review_application(
+        self, body: dict, query: dict, site: str, app_id: str, action: str
+    ) -> FakeResponse:
+        for application in self.applications.get(site, []):
+            if application["id"] == int(app_id):
+                if action == "approve":
+                    application["status"] = 1
+                else:
+                    application["status"] = 2
+                    application["declineReasonType"] = body.get("reasonType")
+                    application["declineReasonDetail"] = body.get("reasonDetail")
+                return FakeResponse(200, {"data": None})
+        return FakeResponse(404, {"error": "application not found"})
+
+    def _change_privilege(
+        self, body: dict, query: dict, site: str, user_id: str
+    ) -> FakeResponse:
+        if body.get("action") not in ("grant", "revoke"):
+            return FakeResponse(400, {"error": "invalid action"})
+        self.privileges[(site, int(user_id))] = body["action"]
+        return FakeResponse(200, {"data": None})
+
+    def _user_with_permissions(self, index: int) -> dict:
+        site = self.sites[index % len(self.sites)]
+        return {
+            "user": {
+                "id": index + 1,
+                "name": f"User{index}",
+                "unixName": f"user{index}",
+                "avatarUrl": None,
+                "isDeleted": False,
+            },
+            "roles": [],
+            "permissions": [f"moderate:{site['unixName']}"] if index % 50 == 0 else [],
+        }
+
+    def _get_user(self, body: dict, query: dict, user_id: str) -> FakeResponse:
+        index = int(user_id) - 1
+        if not 0 <= index < self.linked_accounts:
+            return FakeResponse(404, {"error": "user not found"})
+        return FakeResponse(200, {"data": self._user_with_permissions(index)})
+
+    def _get_users_bulk(self, body: dict, query: dict) -> FakeResponse:
+        if not self.bulk_users:
+            return FakeResponse(404, {"error": "not found"})
+        users = [
+            self._user_with_permissions(int(user_id) - 1)
+            for user_id in body.get("user_ids", [])
+            if 0 <= int(user_id) - 1 < self.linked_accounts
+        ]
+        return FakeResponse(200, {"data": {"users": users}})
+
+    def _get_site_memberships(
+        self, body: dict, query: dict, user_id: str
+    ) -> FakeResponse:
+        index = int(user_id) - 1
+        if not 0 <= index < self.linked_accounts:
+            return FakeResponse(404, {"error": "user not found"})
+        memberships = []
+        for membership in self._bulk_memberships(index):
+            site = self.sites[index % len(self.sites)]
+            memberships.append(
+                {
+                    "id": membership["id"],
+                    "siteId": membership["site_id"],
+                    "userId": index + 1,
+                    "joinedAt": membership["joined_at"],
+                    "isResigned": membership["is_resigned"],
+                    "site": site,
+                }
+            )
+        return FakeResponse(200, {"data": memberships})
+
+    # ========== ディスパッチ ==========
+
+    async def handle(
+        self, method: str, path: str, query: dict, body: bytes, headers: dict
+    ) -> FakeResponse:
+        self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+        result = await self._dispatch(method, path, query, body, headers)
+        if self.bulk_users:
+            result.headers["X-Panopticon-Features"] = "users-bulk"
+        return result
+
+    async def _dispatch(
+        self, method: str, path: str, query: dict, body: bytes, headers: dict
+    ) -> FakeResponse:
+
+        if self.latency or self.latency_jitter:
+            await asyncio.sleep(
+                self.latency + self.random.uniform(0, self.latency_jitter)
+            )
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            return FakeResponse(self.error_status, {"error": "injected failure"})
+
+        if not headers.get("authorization", "").startswith("Bearer "):
+            return FakeResponse(401, {"error": "unauthorized"})
+
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if match and route_method == method:
+                payload = json.loads(body) if body else {}
+                result = handler(payload, query, **match.groupdict())
+                if method == "GET" and result.status == 200:
+                    return self._with_etag(result, headers.get("if-none-match"))
+                return result
+
+        return FakeResponse(404, {"error": "not found"})
+
+    def _with_etag(
+        self, result: FakeResponse, if_none_match: Optional[str]
+    ) -> FakeResponse:
+        digest = hashlib.sha1(
+            json.dumps(result.body, sort_keys=True).encode(), usedforsecurity=False
+        ).hexdigest()
+        etag = f'"{digest}"'
+        if if_none_match == etag:
+            return FakeResponse(304, {}, {"ETag": etag})
+        result.headers["ETag"] = etag
+        return result
+
+    async def _handle_httpx(self, request: httpx.Request) -> httpx.Response:
+        query = {
+            key: values[-1]
+            for key, values in parse_qs(request.url.query.decode()).items()
+        }
+        result = await self.handle(
+            request.method,
+            request.url.path,
+            query,
+            await request.aread(),
+            {key.lower(): value for key, value in request.headers.items()},
+        )
+        if result.status == 304:
+            return httpx.Response(304, headers=result.headers)
+        return httpx.Response(result.status, json=result.body, headers=result.headers)
+
+    def transport(self) -> httpx.MockTransport:
+        """PanopticonClientに渡すためのtransport"""
+        return httpx.MockTransport(self._handle_httpx)
+
+    async def __call__(self, scope, receive, send):
+        """ASGIアプリとして動作する"""
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        query = {
+            key: values[-1]
+            for key, values in parse_qs(scope.get("query_string", b"").decode()).items()
+        }
+        headers = {
+            key.decode().lower(): value.decode() for key, value in scope["headers"]
+        }
+        result = await self.handle(scope["method"], scope["path"], query, body, headers)
+
+        content = b"" if result.status == 304 else json.dumps(result.body).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": result.status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(content)).encode()),
+                    *[(k.encode(), v.encode()) for k, v in result.headers.items()],
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
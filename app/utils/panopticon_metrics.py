@@ -0,0 +1,97 @@
+"""Panopticon APIのエンドポイントごとのメトリクス"""
+
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+
+# レイテンシのヒストグラムの境界(秒)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+
+
+@dataclass
+class EndpointMetrics:
+    requests: int = 0
+    retries: int = 0
+    transport_errors: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    total_latency: float = 0.0
+    status_codes: Counter = field(default_factory=Counter)
+    # LATENCY_BUCKETSの各境界以下に収まった件数（累積ではない）
+    latency_buckets: list[int] = field(
+        default_factory=lambda: [0] * len(LATENCY_BUCKETS)
+    )
+
+    def observe(self, latency: float, status_code: int, sent: int, received: int):
+        self.requests += 1
+        self.total_latency += latency
+        self.status_codes[status_code] += 1
+        self.bytes_sent += sent
+        self.bytes_received += received
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.latency_buckets[i] += 1
+                break
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.requests if self.requests else 0.0
+
+    def percentile(self, q: float) -> float:
+        """ヒストグラムから求めた近似値（該当バケットの上限）"""
+        if not self.requests:
+            return 0.0
+        threshold = self.requests * q
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+            seen += count
+            if seen >= threshold:
+                return bound
+        return math.inf
+
+    @property
+    def error_count(self) -> int:
+        return self.transport_errors + sum(
+            count for status, count in self.status_codes.items() if status >= 400
+        )
+
+
+class PanopticonMetrics:
+    def __init__(self):
+        self.endpoints: dict[str, EndpointMetrics] = {}
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        if name not in self.endpoints:
+            self.endpoints[name] = EndpointMetrics()
+        return self.endpoints[name]
+
+    def snapshot(self) -> dict[str, dict]:
+        return {
+            name: {
+                "requests": m.requests,
+                "retries": m.retries,
+                "transport_errors": m.transport_errors,
+                "status_codes": dict(m.status_codes),
+                "bytes_sent": m.bytes_sent,
+                "bytes_received": m.bytes_received,
+                "mean_latency": m.mean_latency,
+                "p50_latency": m.percentile(0.5),
+                "p95_latency": m.percentile(0.95),
+                "latency_buckets": dict(zip(LATENCY_BUCKETS, m.latency_buckets)),
+            }
+            for name, m in self.endpoints.items()
+        }
+
+    def summary(self) -> list[str]:
+        """/status表示用（リクエスト数の多い順）"""
+        lines = []
+        for name, m in sorted(
+            self.endpoints.items(), key=lambda item: item[1].requests, reverse=True
+        ):
+            lines.append(
+                f"`{name}`: {m.requests}件 "
+                f"平均{m.mean_latency * 1000:.0f}ms / p95≤{m.percentile(0.95):g}s "
+                f"エラー{m.error_count} リトライ{m.retries} "
+                f"受信{m.bytes_received / 1024:.0f}KiB"
+            )
+        return lines
@@ -0,0 +1,96 @@
+"""Panopticon APIへのリクエストのレート制限（トークンバケット・優先度レーン）"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# 優先度（小さいほど優先）
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+_priority: ContextVar[int] = ContextVar(
+    "panopticon_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+@contextmanager
+def background_priority():
+    """
+    このブロック内のPanopticonへのリクエストをバックグラウンド扱いにする
+    同期ループやポーリング等、ユーザーの操作を待たせない処理で使う
+    """
+    token = _priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class TokenBucket:
+    """
+    毎秒rate個のトークンを補充し、最大burst個まで貯めるトークンバケット
+    トークン待ちのリクエストは優先度順（同じ優先度なら到着順）に通す
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+        # (priority, seq, future)
+        self.waiters: list[tuple[int, int, asyncio.Future]] = []
+        self.seq = itertools.count()
+        self.dispatcher: Optional[asyncio.Task] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, priority: Optional[int] = None):
+        if self.rate <= 0:
+            return
+
+        self._refill()
+        if not self.waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        priority = current_priority() if priority is None else priority
+        heapq.heappush(self.waiters, (priority, next(self.seq), future))
+
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.create_task(self._dispatch())
+
+        await future
+
+    async def _dispatch(self):
+        while self.waiters:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+
+            _, _, future = heapq.heappop(self.waiters)
+            # キャンセル済みの待機者にはトークンを渡さない
+            if future.done():
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+
+    def waiting_count(self, priority: Optional[int] = None) -> int:
+        return sum(
+            1
+            for waiter_priority, _, future in self.waiters
+            if not future.done() and (priority is None or waiter_priority == priority)
+        )
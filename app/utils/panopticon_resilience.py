@@ -0,0 +1,136 @@
+"""Panopticon APIクライアントの耐障害性（リトライ・タイムアウト・サーキットブレーカー）"""
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+class PanopticonUnavailableError(Exception):
+    """サーキットブレーカーが開いているため、リクエストを送信しなかった"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            f"Panopticon is unavailable (circuit open, retry after {retry_after:.0f}s)"
+        )
+        self.retry_after = retry_after
+
+
+@dataclass
+class RetryPolicy:
+    """冪等なリクエストのリトライ設定（full jitter付き指数バックオフ）"""
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 4.0
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """attempt回目（1始まり）の失敗後に待つ秒数"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))  # nosec B311
+
+
+class AdaptiveTimeout:
+    """
+    エンドポイントごとの応答時間からタイムアウトを決める
+    TCPの再送タイムアウトと同じく、平滑化した平均と偏差から算出する
+    タイムアウトした場合は次の応答を観測するまで値を倍にする（上限はmaximum）
+    """
+
+    def __init__(
+        self, initial: float = 30.0, minimum: float = 5.0, maximum: float = 30.0
+    ):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.srtt: Optional[float] = None
+        self.rttvar: float = 0.0
+        # タイムアウト後に引き上げた値（応答を観測したら解除する）
+        self.backed_off: Optional[float] = None
+
+    def backoff(self):
+        self.backed_off = min(self.maximum, self.value * 2)
+
+    def observe(self, elapsed: float):
+        self.backed_off = None
+        if self.srtt is None:
+            self.srtt = elapsed
+            self.rttvar = elapsed / 2
+            return
+
+        self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - elapsed)
+        self.srtt = 0.875 * self.srtt + 0.125 * elapsed
+
+    @property
+    def value(self) -> float:
+        if self.backed_off is not None:
+            return self.backed_off
+        if self.srtt is None:
+            return self.initial
+        return max(self.minimum, min(self.maximum, self.srtt + 4 * self.rttvar))
+
+
+class CircuitBreaker:
+    """
+    連続した失敗がthreshold回に達したらcooldown秒間リクエストを遮断する
+    cooldown経過後は1件だけ試行を通し(half-open)、成功すれば復帰する
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    @property
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def before_request(self):
+        """遮断中であればPanopticonUnavailableErrorを送出する"""
+        state = self.state
+        if state == self.OPEN:
+            raise PanopticonUnavailableError(self.retry_after)
+        if state == self.HALF_OPEN:
+            if self.probing:
+                raise PanopticonUnavailableError(self.retry_after)
+            self.probing = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def release_probe(self):
+        """試行が成功・失敗のどちらにもならずに終わった場合（キャンセル等）"""
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def describe(self) -> str:
+        state = self.state
+        if state == self.OPEN:
+            return f"open（残り{self.retry_after:.0f}秒）"
+        if state == self.HALF_OPEN:
+            return "half-open"
+        return f"closed（連続失敗 {self.failures}回）"
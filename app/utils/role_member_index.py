@@ -0,0 +1,91 @@
+from typing import Iterable, Optional
+
+import discord
+
+
+# ロール -> メンバーIDの逆引きインデックス
+class RoleMemberIndex:
+    """
+    ギルドごとに role_id -> member_id の集合を保持する
+    role.members はギルドの全メンバーを走査するため、ロールのメンバー列挙ではこちらを参照する
+    （1人のメンバーの所持判定は member.roles で足りる）
+    更新は cogs/role_member_index.py のイベントリスナーから行う
+    """
+
+    def __init__(self):
+        # guild_id -> role_id -> member_ids
+        self.memory: dict[int, dict[int, set[int]]] = {}
+
+    def rebuild(
+        self, guild: discord.Guild, members: Optional[Iterable[discord.Member]] = None
+    ):
+        """
+        ギルドのインデックスを作り直す
+        membersを省略した場合はキャッシュ済みのメンバーを使用する
+        """
+        index: dict[int, set[int]] = {role.id: set() for role in guild.roles}
+        for member in guild.members if members is None else members:
+            for role in member.roles:
+                index.setdefault(role.id, set()).add(member.id)
+        self.memory[guild.id] = index
+
+    def _get_guild_index(self, guild: discord.Guild) -> dict[int, set[int]]:
+        if guild.id not in self.memory:
+            self.rebuild(guild)
+        return self.memory[guild.id]
+
+    def member_ids(self, guild: discord.Guild, role_id: int) -> frozenset[int]:
+        return frozenset(self._get_guild_index(guild).get(role_id, ()))
+
+    def update_member(self, before: discord.Member, after: discord.Member):
+        index = self.memory.get(after.guild.id)
+        if index is None:
+            return
+
+        before_ids = {role.id for role in before.roles}
+        after_ids = {role.id for role in after.roles}
+
+        for role_id in before_ids - after_ids:
+            index.get(role_id, set()).discard(after.id)
+        for role_id in after_ids - before_ids:
+            index.setdefault(role_id, set()).add(after.id)
+
+    def add_member(self, member: discord.Member):
+        index = self.memory.get(member.guild.id)
+        if index is None:
+            return
+
+        for role in member.roles:
+            index.setdefault(role.id, set()).add(member.id)
+
+    def remove_member(self, member: discord.Member):
+        index = self.memory.get(member.guild.id)
+        if index is None:
+            return
+
+        for member_ids in index.values():
+            member_ids.discard(member.id)
+
+    def add_role(self, role: discord.Role):
+        index = self.memory.get(role.guild.id)
+        if index is None:
+            return
+
+        index.setdefault(role.id, set())
+
+    def remove_role(self, role: discord.Role):
+        index = self.memory.get(role.guild.id)
+        if index is None:
+            return
+
+        index.pop(role.id, None)
+
+    def invalidate_guild(self, guild_id: int):
+        self.memory.pop(guild_id, None)
+
+    def clear(self):
+        self.memory.clear()
+
+
+# プロセス全体で共有するインスタンス
+role_member_index = RoleMemberIndex()
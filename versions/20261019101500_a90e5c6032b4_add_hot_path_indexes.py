@@ -0,0 +1,110 @@
+"""add hot path indexes
+
+Revision ID: a90e5c6032b4
+Revises: 780b5a5101cb
+Create Date: 2026-10-19 10:15:00
+
+定期実行されるクエリ用のインデックスを追加:
+- site_applications (original_id, site_unix_name): 申請ごとの通知済みチェック
+  重複通知を防ぐためunique制約とする（既存の重複は古い行を残して削除）
+- privilege_remove_queue.expired_at: 毎分の期限切れチェック
+- staff_requests (due_date) WHERE is_due_date_notified = false: 毎時の期限チェック
+- staff_request_users (staff_request_id, status): 未対応ユーザーの取得
+- staff_request_users.dm_message_id: DMのボタン操作時の検索
+- registered_roles.guild_id: ロール同期
+- role_group_roles.guild_id: ロールグループのギルド単位の検索
+
+nick_update_target_guilds.guild_id は既存のunique制約のインデックスを使うため追加しない
+
+テーブルをロックしないよう、インデックスはCONCURRENTLYで作成する
+（トランザクション外で実行する必要があるため、autocommit_blockを使用）
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a90e5c6032b4"
+down_revision = "780b5a5101cb"
+branch_labels = None
+depends_on = None
+
+# (インデックス名, テーブル名, カラム, 追加オプション)
+INDEXES = [
+    (
+        "ix_privilege_remove_queue_expired_at",
+        "privilege_remove_queue",
+        ["expired_at"],
+        {},
+    ),
+    (
+        "ix_staff_requests_due_date_unnotified",
+        "staff_requests",
+        ["due_date"],
+        {"postgresql_where": sa.text("is_due_date_notified = false")},
+    ),
+    (
+        "ix_staff_request_users_staff_request_id_status",
+        "staff_request_users",
+        ["staff_request_id", "status"],
+        {},
+    ),
+    (
+        "ix_staff_request_users_dm_message_id",
+        "staff_request_users",
+        ["dm_message_id"],
+        {},
+    ),
+    ("ix_registered_roles_guild_id", "registered_roles", ["guild_id"], {}),
+    ("ix_role_group_roles_guild_id", "role_group_roles", ["guild_id"], {}),
+]
+
+
+def upgrade():
+    # === site_applications ===
+    # 1. 重複した通知済みレコードを削除（最初のものを残す）
+    op.execute(
+        """
+        DELETE FROM site_applications a
+        USING site_applications b
+        WHERE a.original_id = b.original_id
+          AND a.site_unix_name = b.site_unix_name
+          AND a.id > b.id
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        # 2. uniqueインデックスを作成
+        op.create_index(
+            "uq_site_applications_original_id_site_unix_name",
+            "site_applications",
+            ["original_id", "site_unix_name"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+        # === その他のインデックス ===
+        for name, table, columns, options in INDEXES:
+            op.create_index(
+                name, table, columns, postgresql_concurrently=True, **options
+            )
+
+    # 3. 作成済みのインデックスをunique制約として登録
+    op.execute(
+        "ALTER TABLE site_applications "
+        "ADD CONSTRAINT uq_site_applications_original_id_site_unix_name "
+        "UNIQUE USING INDEX uq_site_applications_original_id_site_unix_name"
+    )
+
+
+def downgrade():
+    op.drop_constraint(
+        "uq_site_applications_original_id_site_unix_name",
+        "site_applications",
+        type_="unique",
+    )
+
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
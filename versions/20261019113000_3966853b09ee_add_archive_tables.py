@@ -0,0 +1,103 @@
+"""add archive tables
+
+Revision ID: 3966853b09ee
+Revises: a90e5c6032b4
+Create Date: 2026-10-19 11:30:00
+
+完了した稟議・通知済みの参加申請を移すアーカイブテーブルを追加:
+- staff_requests_archive
+- staff_request_users_archive
+- site_applications_archive
+
+元テーブルと同じカラム（idは引き継ぐ）にarchived_atを加えたもの
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "3966853b09ee"
+down_revision = "a90e5c6032b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "staff_requests_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("summary_message_guild_id", sa.BigInteger(), nullable=False),
+        sa.Column("summary_message_channel_id", sa.BigInteger(), nullable=False),
+        sa.Column("summary_message_id", sa.BigInteger(), nullable=False),
+        sa.Column("created_by_id", sa.BigInteger(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("url", sa.String(), nullable=True),
+        sa.Column("due_date", sa.Date(), nullable=True),
+        sa.Column("is_due_date_notified", sa.Boolean(), nullable=False),
+        sa.Column("last_remind_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "staff_request_users_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("staff_request_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("dm_message_id", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(name="staffrequeststatus", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_staff_request_users_archive_staff_request_id",
+        "staff_request_users_archive",
+        ["staff_request_id"],
+    )
+
+    op.create_table(
+        "site_applications_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("original_id", sa.Integer(), nullable=False),
+        sa.Column("site_unix_name", sa.String(length=100), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("site_applications_archive")
+    op.drop_index(
+        "ix_staff_request_users_archive_staff_request_id",
+        table_name="staff_request_users_archive",
+    )
+    op.drop_table("staff_request_users_archive")
+    op.drop_table("staff_requests_archive")
@@ -0,0 +1,79 @@
+"""add staff request status counters
+
+Revision ID: 201bd6d4ab01
+Revises: 3966853b09ee
+Create Date: 2026-10-19 12:00:00
+
+staff_requestsにステータスごとの人数を追加:
+- pending_count / done_count / expired_count / canceled_by_requester_count
+- 既存の稟議はstaff_request_usersから集計して埋める
+- 未対応ユーザーが残っている稟議用の部分インデックス (pending_count > 0)
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "201bd6d4ab01"
+down_revision = "3966853b09ee"
+branch_labels = None
+depends_on = None
+
+# カラム名 -> staff_request_users.status の値
+COUNTER_COLUMNS = {
+    "pending_count": "PENDING",
+    "done_count": "DONE",
+    "expired_count": "EXPIRED",
+    "canceled_by_requester_count": "CANCELED_BY_REQUESTER",
+}
+
+
+def upgrade():
+    # 1. カラム追加
+    for column in COUNTER_COLUMNS:
+        op.add_column(
+            "staff_requests",
+            sa.Column(column, sa.Integer(), server_default="0", nullable=False),
+        )
+
+    # 2. 既存データの集計
+    counts = ", ".join(
+        f"count(*) FILTER (WHERE status = '{status}') AS {column}"
+        for column, status in COUNTER_COLUMNS.items()
+    )
+    assignments = ", ".join(f"{column} = c.{column}" for column in COUNTER_COLUMNS)
+    op.execute(
+        f"""
+        UPDATE staff_requests sr
+        SET {assignments}
+        FROM (
+            SELECT staff_request_id, {counts}
+            FROM staff_request_users
+            GROUP BY staff_request_id
+        ) c
+        WHERE c.staff_request_id = sr.id
+        """
+    )
+
+    # 3. 部分インデックス
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_staff_requests_due_date_has_pending",
+            "staff_requests",
+            ["due_date"],
+            postgresql_where=sa.text("pending_count > 0"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_staff_requests_due_date_has_pending",
+            table_name="staff_requests",
+            postgresql_concurrently=True,
+        )
+
+    for column in reversed(list(COUNTER_COLUMNS)):
+        op.drop_column("staff_requests", column)
@@ -0,0 +1,45 @@
+"""add staff request digest guilds
+
+Revision ID: 7c2e91d4b5a3
+Revises: 201bd6d4ab01
+Create Date: 2026-10-19 13:00:00
+
+リマインドをユーザーごとに1通のDMにまとめるギルドの設定を追加:
+- staff_request_digest_guilds（登録されているギルドがまとめ送信の対象）
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7c2e91d4b5a3"
+down_revision = "201bd6d4ab01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "staff_request_digest_guilds",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("guild_id", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("guild_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("staff_request_digest_guilds")
@@ -0,0 +1,92 @@
+"""add jobs
+
+Revision ID: d41f8a27c6e0
+Revises: 7c2e91d4b5a3
+Create Date: 2026-10-19 14:00:00
+
+時刻指定で実行する処理のキュー（jobs）を追加:
+- ワーカーは run_at <= now() かつリースが切れている行を FOR UPDATE SKIP LOCKED で取得する
+- dedupe_key は同じ処理の重複登録を防ぐためのunique制約
+
+既存のデータから1回限りのジョブを登録する:
+- privilege.revoke: privilege_remove_queue の各行（expired_atに実行）
+- staff_request.due_date: 期限超過が未通知で、未対応ユーザーが残っている稟議（期限日の翌日0時 JST に実行）
+定期ジョブ（リマインド・参加申請の監視）はワーカーの起動時に登録される
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "d41f8a27c6e0"
+down_revision = "7c2e91d4b5a3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=100), nullable=False),
+        sa.Column(
+            "payload",
+            postgresql.JSONB(astext_type=sa.Text()),
+            server_default="{}",
+            nullable=False,
+        ),
+        sa.Column("run_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("dedupe_key", sa.String(length=200), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("dedupe_key"),
+    )
+    op.create_index("ix_jobs_run_at", "jobs", ["run_at"])
+
+    # 既存の権限剥奪キュー
+    op.execute(
+        """
+        INSERT INTO jobs (kind, payload, run_at, dedupe_key)
+        SELECT 'privilege.revoke',
+               jsonb_build_object('queue_id', id),
+               expired_at,
+               'privilege.revoke:' || id
+        FROM privilege_remove_queue
+        """
+    )
+
+    # 期限超過が未通知の稟議
+    op.execute(
+        """
+        INSERT INTO jobs (kind, payload, run_at, dedupe_key)
+        SELECT 'staff_request.due_date',
+               jsonb_build_object('staff_request_id', id),
+               (due_date + 1)::timestamp AT TIME ZONE 'Asia/Tokyo',
+               'staff_request.due_date:' || id
+        FROM staff_requests
+        WHERE due_date IS NOT NULL
+          AND is_due_date_notified = false
+          AND pending_count > 0
+        """
+    )
+
+
+def downgrade():
+    op.drop_index("ix_jobs_run_at", table_name="jobs")
+    op.drop_table("jobs")
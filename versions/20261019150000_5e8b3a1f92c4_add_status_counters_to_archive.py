@@ -0,0 +1,60 @@
+"""add status counters to archive
+
+Revision ID: 5e8b3a1f92c4
+Revises: d41f8a27c6e0
+Create Date: 2026-10-19 15:00:00
+
+staff_requestsに追加したステータスごとの人数をstaff_requests_archiveにも追加する
+（アーカイブはstaff_requestsの全カラムをそのまま移すため、カラムを揃える必要がある）
+既にアーカイブ済みの稟議はstaff_request_users_archiveから集計して埋める
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5e8b3a1f92c4"
+down_revision = "d41f8a27c6e0"
+branch_labels = None
+depends_on = None
+
+# カラム名 -> staff_request_users_archive.status の値
+COUNTER_COLUMNS = {
+    "pending_count": "PENDING",
+    "done_count": "DONE",
+    "expired_count": "EXPIRED",
+    "canceled_by_requester_count": "CANCELED_BY_REQUESTER",
+}
+
+
+def upgrade():
+    for column in COUNTER_COLUMNS:
+        op.add_column(
+            "staff_requests_archive",
+            sa.Column(column, sa.Integer(), server_default="0", nullable=False),
+        )
+
+    # 既存データの集計
+    counts = ", ".join(
+        f"count(*) FILTER (WHERE status = '{status}') AS {column}"
+        for column, status in COUNTER_COLUMNS.items()
+    )
+    assignments = ", ".join(f"{column} = c.{column}" for column in COUNTER_COLUMNS)
+    op.execute(
+        f"""
+        UPDATE staff_requests_archive sr
+        SET {assignments}
+        FROM (
+            SELECT staff_request_id, {counts}
+            FROM staff_request_users_archive
+            GROUP BY staff_request_id
+        ) c
+        WHERE c.staff_request_id = sr.id
+        """
+    )
+
+
+def downgrade():
+    for column in COUNTER_COLUMNS:
+        op.drop_column("staff_requests_archive", column)
@@ -0,0 +1,45 @@
+"""schedule staff request reminders
+
+Revision ID: b7d20c4e6f15
+Revises: 5e8b3a1f92c4
+Create Date: 2026-10-19 16:00:00
+
+リマインドを1時間ごとの全件走査から、稟議ごとの1回限りのジョブに変更する:
+- 定期ジョブ（dedupe_key = 'staff_request.remind'）を削除
+- 未対応ユーザーが残っている稟議ごとに、前回のリマインド（なければ作成日時）の2日後にジョブを登録
+  （last_remind_atはタイムゾーンなしのUTCとして保存されている）
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b7d20c4e6f15"
+down_revision = "5e8b3a1f92c4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("DELETE FROM jobs WHERE dedupe_key = 'staff_request.remind'")
+
+    op.execute(
+        """
+        INSERT INTO jobs (kind, payload, run_at, dedupe_key)
+        SELECT 'staff_request.remind',
+               jsonb_build_object('staff_request_id', id),
+               coalesce(last_remind_at AT TIME ZONE 'UTC', created_at)
+                   + interval '2 days',
+               'staff_request.remind:' || id
+        FROM staff_requests
+        WHERE pending_count > 0
+        ON CONFLICT (dedupe_key) DO NOTHING
+        """
+    )
+
+
+def downgrade():
+    # 定期ジョブはワーカーの起動時に登録し直される
+    op.execute(
+        "DELETE FROM jobs WHERE kind IN ('staff_request.remind', 'staff_request.remind_digest')"
+    )